@@ -4,10 +4,27 @@ from .telegram_handler import TelegramHandler
 from .ai_processor import AIProcessor
 from .telegram_publisher import TelegramPublisher
 from .twitter_publisher import TwitterPublisher
+from .pipeline import PublishPipeline
+from .job_queue import JobQueue
+from .worker_pool import WorkerPool
+from .router import Route, Router
+from .publisher_pool import PublisherPool
+from .fair_scheduler import FairScheduler
+from .post_store import PostStore
+from .archive import PostArchive
 
 __all__ = [
     'TelegramHandler',
     'AIProcessor',
     'TelegramPublisher',
     'TwitterPublisher',
+    'PublishPipeline',
+    'JobQueue',
+    'WorkerPool',
+    'Route',
+    'Router',
+    'PublisherPool',
+    'FairScheduler',
+    'PostStore',
+    'PostArchive',
 ]
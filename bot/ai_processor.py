@@ -1,12 +1,34 @@
 """AI processing module using OpenAI API."""
 
-from typing import Dict, Optional
+import asyncio
+import base64
+import hashlib
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from openai import AsyncOpenAI
 from config import config
 from utils.logger import setup_logger
+from utils.deadline import Deadline, stage_timeout
+from utils.image_handler import ImageHandler
+from utils.language_detector import detect_language, contains_url
+from utils.summarizer import build_short_version, truncate_weighted, twitter_length
+from utils.text_preprocessor import TextPreprocessor, PreprocessedText, PLACEHOLDER_RE
+from bot.translation_memory import (
+    TranslationMemory,
+    canonicalize_placeholders,
+    apply_placeholder_mapping
+)
 
 logger = setup_logger(__name__)
 
+# Token usage of the message currently being processed
+_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar('ai_usage', default=None)
+
 
 class AIProcessor:
     """Process messages using OpenAI API."""
@@ -15,75 +37,117 @@ class AIProcessor:
         """Initialize AI processor."""
         self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
         self.model = config.OPENAI_MODEL
+        self.preprocessor = TextPreprocessor()
+        self.image_handler = ImageHandler()
+        # Image-only captions keyed by (prompt style, perceptual hash)
+        self._caption_cache: OrderedDict[Tuple[str, int], Dict[str, str]] = OrderedDict()
+        self.translation_memory: Optional[TranslationMemory] = None
+        if config.TRANSLATION_MEMORY_ENABLED:
+            self.translation_memory = TranslationMemory(
+                config.TRANSLATION_MEMORY_PATH,
+                fuzzy_threshold=config.TRANSLATION_MEMORY_FUZZY_THRESHOLD
+            )
     
-    def _clean_forwarded_text(self, text: str) -> str:
-        """Remove forwarded message signatures and metadata."""
-        if not text:
-            return text
-        
-        lines = text.split('\n')
-        cleaned = []
-        
-        for line in lines:
-            line_stripped = line.strip()
-            
-            # Пропускаем пустые строки в начале
-            if not line_stripped and not cleaned:
-                continue
-            
-            # Пропускаем строки с каналами (содержат |)
-            if '|' in line and len(line_stripped) < 60:
-                continue
-            
-            # Пропускаем строки начинающиеся с @
-            if line_stripped.startswith('@'):
-                continue
-            
-            # Пропускаем разделители
-            if line_stripped in ['—', '——', '———', '____', '---', '___', '–', '–––']:
-                continue
-            
-            # Пропускаем строки только из символов
-            if line_stripped and all(c in '—_-=|–' for c in line_stripped):
-                continue
-            
-            cleaned.append(line)
-        
-        # Убираем пустые строки в конце
-        while cleaned and not cleaned[-1].strip():
-            cleaned.pop()
-        
-        return '\n'.join(cleaned).strip()
-    
-    async def process_message(self, text: str, has_image: bool = False) -> Dict[str, str]:
+    async def process_message(
+        self,
+        text: str,
+        has_image: bool = False,
+        entities: Optional[Sequence] = None,
+        image_path: Optional[Path] = None,
+        style: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        current_short: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Process message text and generate full and short versions.
         
         Args:
             text: Original message text
             has_image: Whether message has an image
+            entities: Telegram message entities (URLs, mentions, hashtags)
+            image_path: Downloaded image, shown to the model for image-only posts
+            style: Per-route style instructions added to the system prompt
+            deadline: Post deadline; the original text is used when the AI
+                slice runs out
+            current_short: Short version of an earlier revision of the post,
+                kept unless the new text makes it inaccurate
             
         Returns:
-            Dictionary with 'full_text' and 'short_text' keys
+            Dictionary with 'full_text', 'short_text' and 'usage' (token
+            counts) keys, plus 'segments' when the post was translated
+            line by line
         """
+        with self._track_usage() as usage:
+            try:
+                result = dict(await asyncio.wait_for(
+                    self._process_message(text, has_image, entities, image_path, style, current_short),
+                    stage_timeout(deadline, 'ai')
+                ))
+            except asyncio.TimeoutError:
+                deadline.degrade('ai', "model timed out, using original text")
+                result = self._fallback(text, entities, has_image)
+        result['usage'] = usage
+        return result
+    
+    def _fallback(self, text: str, entities: Optional[Sequence], has_image: bool) -> Dict[str, str]:
+        """Publishable result without a model call (original text, truncated short version)."""
+        doc = self.preprocessor.process(text, entities)
+        text = doc.restore(doc.text)
+        if not text and has_image:
+            return {
+                'full_text': "Xem hình ảnh này! 📸",
+                'short_text': "Xem hình ảnh này! 📸 #photo #image"
+            }
+        return {
+            'full_text': text,
+            'short_text': self._create_short_version(text)
+        }
+    
+    async def _process_message(
+        self,
+        text: str,
+        has_image: bool,
+        entities: Optional[Sequence],
+        image_path: Optional[Path],
+        style: Optional[str],
+        current_short: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Pick the cheapest processing path for a message (see process_message)."""
         try:
-            # Очищаем от подписей пересылки
-            text = self._clean_forwarded_text(text)
+            # Protect entities with placeholders and strip forward signatures
+            doc = self.preprocessor.process(text, entities)
+            text = doc.restore(doc.text)
             
             if not text and has_image:
                 # Generate description for image-only message
-                return await self._generate_image_description()
+                return await self._generate_image_description(image_path, style)
+            
+            # Local pre-classifier: avoid a model round trip when possible
+            language = detect_language(text)
+            decision = self._classify_fast_path(text, language)
+            if decision == 'skip':
+                return {
+                    'full_text': text,
+                    'short_text': text
+                }
+            if decision == 'light':
+                return await self._process_light(text)
+            
+            # Vietnamese posts are translated segment by segment via memory
+            if self.translation_memory and language == 'vi':
+                processed = await self._process_with_memory(doc, style, current_short)
+                if processed:
+                    return processed
             
             # Detect language and process
-            prompt = self._build_prompt(text)
+            prompt = self._build_prompt(doc.text, current_short)
             
-            response = await self.client.chat.completions.create(
-                model=self.model,
+            response = await self._complete(
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional social media content editor. Your task is to improve text for social media posts."
-                    },
+                    self._system_message(
+                        "You are a professional social media content editor. Your task is to improve text for social media posts.",
+                        style
+                    ),
                     {
                         "role": "user",
                         "content": prompt
@@ -95,8 +159,15 @@ class AIProcessor:
             
             result = response.choices[0].message.content.strip()
             
-            # Parse the response
+            # Parse the response and put links/mentions back verbatim
             full_text, short_text = self._parse_response(result)
+            full_text = doc.restore(full_text, append_missing=True)
+            if short_text is None:
+                # Local mode (or the model left it out): extract from the result
+                short_text = self._create_short_version(full_text)
+            else:
+                # Measured after restore: links weigh 23 and mentions grow
+                short_text = truncate_weighted(doc.restore(short_text))
             
             logger.info("Message processed successfully")
             return {
@@ -112,16 +183,498 @@ class AIProcessor:
                 'short_text': self._create_short_version(text)
             }
     
-    def _build_prompt(self, text: str) -> str:
+    @contextmanager
+    def _track_usage(self) -> Iterator[Dict[str, int]]:
+        """Count tokens of the completions made inside the block."""
+        outer = _usage.get()
+        usage = {'prompt_tokens': 0, 'completion_tokens': 0}
+        token = _usage.set(usage)
+        try:
+            yield usage
+        finally:
+            _usage.reset(token)
+            if outer is not None:
+                for key, value in usage.items():
+                    outer[key] += value
+    
+    async def _complete(self, **kwargs):
+        """Create a chat completion and add its token usage to the current message."""
+        response = await self.client.chat.completions.create(model=self.model, **kwargs)
+        usage = _usage.get()
+        if usage is not None and getattr(response, 'usage', None):
+            usage['prompt_tokens'] += response.usage.prompt_tokens or 0
+            usage['completion_tokens'] += response.usage.completion_tokens or 0
+        return response
+    
+    def _system_message(self, content: str, style: Optional[str] = None) -> Dict[str, str]:
+        """
+        Build the system message, adding per-route style instructions.
+        
+        Args:
+            content: Base system prompt
+            style: Optional style instructions
+            
+        Returns:
+            Chat message dictionary
+        """
+        if style:
+            content = f"{content}\n\nStyle guide for this account: {style}"
+        return {"role": "system", "content": content}
+    
+    def _classify_fast_path(self, text: str, language: str) -> str:
+        """
+        Decide locally whether a message needs the full AI pass.
+        
+        Args:
+            text: Cleaned message text
+            language: Language detected for the text
+            
+        Returns:
+            'skip', 'light' or 'full'
+        """
+        if not config.FAST_PATH_ENABLED:
+            return 'full'
+        
+        has_url = contains_url(text)
+        # Skipped posts are tweeted verbatim, so never exceed Twitter's limit
+        max_chars = min(config.FAST_PATH_MAX_CHARS, 280)
+        
+        if language != 'en':
+            reason = f"language={language}"
+        elif twitter_length(text) > max_chars:
+            reason = f"length={twitter_length(text)}>{max_chars}"
+        elif has_url and not config.FAST_PATH_ALLOW_URLS:
+            reason = "contains URL"
+        else:
+            decision = config.FAST_PATH_ACTION if config.FAST_PATH_ACTION in ('skip', 'light') else 'full'
+            logger.info(f"Fast path decision: {decision} (language={language}, chars={len(text)}, url={has_url})")
+            return decision
+        
+        logger.info(f"Fast path decision: full ({reason})")
+        return 'full'
+    
+    async def _process_light(self, text: str) -> Dict[str, str]:
+        """
+        Process a post that only needs hashtags, using a cheap prompt.
+        
+        Args:
+            text: Cleaned message text (English, tweet-sized)
+            
+        Returns:
+            Dictionary with 'full_text' and 'short_text' keys
+        """
+        response = await self._complete(
+            messages=[
+                {
+                    "role": "user",
+                    "content": f"Suggest 1-3 relevant hashtags for this post. Reply with the hashtags only, separated by spaces.\n\n{text}"
+                }
+            ],
+            temperature=0.3,
+            max_tokens=30
+        )
+        
+        hashtags = ' '.join(
+            word for word in response.choices[0].message.content.split()
+            if word.startswith('#')
+        )
+        
+        short_text = text
+        if hashtags and twitter_length(f"{text} {hashtags}") <= 280:
+            short_text = f"{text} {hashtags}"
+        
+        logger.info("Message processed with light prompt")
+        return {
+            'full_text': text,
+            'short_text': short_text
+        }
+    
+    async def _process_with_memory(
+        self,
+        doc: PreprocessedText,
+        style: Optional[str] = None,
+        current_short: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Translate a post line by line, sending only segments not in memory.
+        
+        Args:
+            doc: Preprocessed message (text with placeholders)
+            style: Per-route style instructions
+            current_short: Short version of an earlier revision to keep
+                if still accurate
+            
+        Returns:
+            Dictionary with 'full_text', 'short_text' and 'segments' (one
+            translation per source line) keys, or None if the model response
+            could not be matched to the segments
+        """
+        lines = doc.text.split('\n')
+        translations, short_text = await self._translate_lines(lines, range(len(lines)), style, current_short=current_short)
+        if translations is None:
+            return None
+        
+        output = [translations.get(index, line) for index, line in enumerate(lines)]
+        full_text = doc.restore('\n'.join(output).strip(), append_missing=True)
+        if short_text:
+            short_text = truncate_weighted(doc.restore(short_text))
+        else:
+            short_text = self._create_short_version(full_text)
+        
+        return {
+            'full_text': full_text,
+            'short_text': short_text,
+            'segments': [doc.restore(line) for line in output]
+        }
+    
+    async def _translate_lines(
+        self,
+        lines: List[str],
+        indices: Sequence[int],
+        style: Optional[str] = None,
+        current_short: Optional[str] = None
+    ) -> Tuple[Optional[Dict[int, str]], Optional[str]]:
+        """
+        Translate selected lines from memory, asking the model for the rest.
+        
+        Args:
+            lines: Source lines with placeholders
+            indices: Indices of the lines to translate
+            style: Per-route style instructions
+            current_short: Short version of an earlier revision of the post
+            
+        Returns:
+            Tuple of (index -> translation with placeholders, or None if the
+            model response did not match the segments; short_text or None)
+        """
+        translations: Dict[int, str] = {}
+        missing: List[Tuple[int, str, Dict[str, str]]] = []
+        # Missing segment position -> translation of a similar stored segment
+        references: Dict[int, str] = {}
+        hits = 0
+        # Translations written in different styles must not be mixed
+        namespace = hashlib.sha1(style.encode('utf-8')).hexdigest()[:8] if style else ''
+        
+        candidates: List[Tuple[int, str, Dict[str, str]]] = []
+        for index in indices:
+            segment = lines[index].strip()
+            # Blank lines, bare links and emoji-only lines are kept verbatim
+            if not any(c.isalpha() for c in PLACEHOLDER_RE.sub('', segment)):
+                continue
+            
+            canonical, mapping = canonicalize_placeholders(segment)
+            candidates.append((index, canonical, mapping))
+        
+        # SQLite work (one transaction per message) stays off the event loop
+        stored = await asyncio.to_thread(
+            self.translation_memory.lookup,
+            [canonical for _, canonical, _ in candidates],
+            namespace
+        )
+        for (index, canonical, mapping), found in zip(candidates, stored):
+            if found and found[1]:
+                translations[index] = apply_placeholder_mapping(found[0], mapping)
+                hits += 1
+                continue
+            if found:
+                # A similar sentence may differ in a name or in meaning: the
+                # model translates the segment, using the match as a guide
+                references[len(missing)] = found[0]
+            missing.append((index, canonical, mapping))
+        
+        short_text = None
+        if missing:
+            prompt = self._build_segment_prompt(
+                [canonical for _, canonical, _ in missing], current_short, references
+            )
+            response = await self._complete(
+                messages=[
+                    self._system_message(
+                        "You are a professional social media content editor. Your task is to improve text for social media posts.",
+                        style
+                    ),
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.7,
+                max_tokens=1000
+            )
+            
+            result = response.choices[0].message.content.strip()
+            translated, short_text = self._parse_segment_response(result, len(missing))
+            if translated is None:
+                logger.warning("Segment response did not match the request, using full prompt")
+                return None, None
+            
+            await asyncio.to_thread(
+                self.translation_memory.store,
+                [(canonical, translation) for (_, canonical, _), translation in zip(missing, translated)],
+                namespace
+            )
+            for (index, canonical, mapping), translation in zip(missing, translated):
+                translations[index] = apply_placeholder_mapping(translation, mapping)
+        
+        segments = hits + len(missing)
+        logger.info(
+            f"Translation memory: {hits}/{segments} segments reused, {len(references)} with a reference "
+            f"(overall hit rate {self.translation_memory.hit_rate:.1%})"
+        )
+        return translations, short_text
+    
+    async def reprocess_edit(
+        self,
+        previous: Dict[str, Any],
+        text: str,
+        entities: Optional[Sequence] = None,
+        style: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Process an edited message, re-translating only the changed lines.
+        
+        Small edits of posts translated segment by segment reuse the stored
+        translations of unchanged lines; anything else is processed again
+        in full.
+        
+        Args:
+            previous: Stored result of the earlier revision ('cleaned_text',
+                'full_text', 'short_text' and optionally 'segments')
+            text: New message text
+            entities: Telegram message entities for the new text
+            style: Per-route style instructions
+            
+        Returns:
+            Same keys as process_message plus 'cleaned_text' and
+            'incremental' (True when only changed lines were sent)
+        """
+        with self._track_usage() as usage:
+            result = await self._reprocess_edit(previous, text, entities, style)
+        result['usage'] = usage
+        return result
+    
+    async def _reprocess_edit(
+        self,
+        previous: Dict[str, Any],
+        text: str,
+        entities: Optional[Sequence],
+        style: Optional[str]
+    ) -> Dict[str, Any]:
+        """Diff and re-translate an edited message (see reprocess_edit)."""
+        doc = self.preprocessor.process(text, entities)
+        cleaned_text = doc.restore(doc.text)
+        old_lines = (previous.get('cleaned_text') or '').split('\n')
+        old_segments = previous.get('segments')
+        current_short = previous.get('short_text')
+        
+        if cleaned_text == previous.get('cleaned_text'):
+            # Only formatting or the forward signature changed
+            logger.info("Edit leaves the text unchanged, keeping the stored result")
+            return {
+                'full_text': previous.get('full_text'),
+                'short_text': current_short,
+                'segments': old_segments,
+                'cleaned_text': cleaned_text,
+                'incremental': False
+            }
+        
+        plan = None
+        if (self.translation_memory and old_segments and len(old_segments) == len(old_lines)
+                and detect_language(cleaned_text) == 'vi'):
+            plan = self._plan_edit(old_lines, doc)
+        
+        if plan is None:
+            processed = await self.process_message(text, entities=entities, style=style, current_short=current_short)
+            processed['cleaned_text'] = cleaned_text
+            processed['incremental'] = False
+            return processed
+        
+        lines = doc.text.split('\n')
+        reused, changed = plan
+        try:
+            translations, short_text = await self._translate_lines(
+                lines, changed, style, current_short=current_short
+            )
+        except Exception as e:
+            logger.error(f"Incremental edit failed, processing in full: {e}")
+            translations = None
+        if translations is None:
+            processed = await self.process_message(text, entities=entities, style=style, current_short=current_short)
+            processed['cleaned_text'] = cleaned_text
+            processed['incremental'] = False
+            return processed
+        
+        segments = []
+        for index, line in enumerate(lines):
+            if index in reused:
+                segments.append(old_segments[reused[index]])
+            else:
+                segments.append(doc.restore(translations.get(index, line)))
+        
+        full_text = doc.restore('\n'.join(segments).strip(), append_missing=True)
+        if config.SHORT_VERSION_MODE == 'local':
+            short_text = self._create_short_version(full_text)
+        else:
+            short_text = truncate_weighted(doc.restore(short_text)) if short_text else current_short
+        
+        logger.info(f"Edit processed incrementally: {len(changed)}/{len(lines)} lines re-translated")
+        return {
+            'full_text': full_text,
+            'short_text': short_text or self._create_short_version(full_text),
+            'segments': segments,
+            'cleaned_text': cleaned_text,
+            'incremental': True
+        }
+    
+    def _plan_edit(self, old_lines: List[str], doc: PreprocessedText) -> Optional[Tuple[Dict[int, int], List[int]]]:
+        """
+        Diff the old and new source lines.
+        
+        Args:
+            old_lines: Cleaned lines of the earlier revision
+            doc: Preprocessed new revision
+            
+        Returns:
+            Tuple of (new line index -> old line index for unchanged lines,
+            indices of changed lines), or None if the edit is too large
+        """
+        new_lines = [doc.restore(line) for line in doc.text.split('\n')]
+        reused: Dict[int, int] = {}
+        changed: List[int] = []
+        
+        matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                reused.update(zip(range(j1, j2), range(i1, i2)))
+            else:
+                changed.extend(range(j1, j2))
+        
+        if len(changed) > len(new_lines) * config.EDIT_INCREMENTAL_MAX_RATIO:
+            logger.info(f"Edit touches {len(changed)}/{len(new_lines)} lines, processing in full")
+            return None
+        return reused, changed
+    
+    def _build_segment_prompt(
+        self,
+        segments: List[str],
+        current_short: Optional[str] = None,
+        references: Optional[Dict[int, str]] = None
+    ) -> str:
+        """
+        Build prompt translating only the given segments.
+        
+        Args:
+            segments: Source segments missing from translation memory
+            current_short: Short version to keep unless the segments change it
+            references: Segment position -> stored translation of a similar
+                segment, offered for consistent wording
+            
+        Returns:
+            Formatted prompt
+        """
+        numbered = '\n'.join(f"{i}. {segment}" for i, segment in enumerate(segments, 1))
+        reference_section = ""
+        if references:
+            listed = '\n'.join(f"{position + 1}. {translation}" for position, translation in sorted(references.items()))
+            reference_section = (
+                "\n\nReference translations of similar earlier segments (same numbering). "
+                "Reuse their wording only where the meaning is identical; names, places, "
+                "numbers and meaning must follow the segment itself:\n"
+                f"{listed}"
+            )
+        # In local mode the short version is extracted from the result instead
+        short_section = ""
+        if config.SHORT_VERSION_MODE != 'local':
+            short_instructions = "Write a concise version of the post (max 240 characters) with relevant hashtags. The total length including hashtags must not exceed 280 characters for Twitter"
+            if current_short:
+                short_instructions = (
+                    "The post was edited and these segments are the changed lines. "
+                    f"The current short version is: {current_short}\n"
+                    "Repeat it EXACTLY if it is still accurate; otherwise rewrite it "
+                    "(max 240 characters with hashtags, never over 280 characters)"
+                )
+            short_section = f"\n\nSHORT VERSION:\n[{short_instructions}]"
+        return f"""Translate each numbered segment of a Vietnamese social media post to English.
+
+Segments:
+{numbered}{reference_section}
+
+Tasks:
+1. Translate every segment on its own line, keeping the same numbering
+2. Improve the writing style to be engaging and professional
+3. Keep placeholders such as {{U1}}, {{M1}} and {{H1}} exactly as written (they stand for links, mentions and hashtags)
+
+Format your response EXACTLY like this:
+
+SEGMENTS:
+1. [translation of segment 1]
+2. [translation of segment 2]{short_section}"""
+    
+    def _parse_segment_response(self, response: str, expected: int) -> Tuple[Optional[List[str]], Optional[str]]:
+        """
+        Parse numbered segment translations and the short version.
+        
+        Args:
+            response: AI response text
+            expected: Number of segments that were sent
+            
+        Returns:
+            Tuple of (translations or None if incomplete, short_text or None)
+        """
+        body, _, short_part = response.partition('SHORT VERSION:')
+        body = body.replace('SEGMENTS:', '')
+        
+        numbered = {}
+        for match in re.finditer(r'^\s*(\d+)[.)]\s*(.+?)\s*$', body, re.MULTILINE):
+            numbered.setdefault(int(match.group(1)), match.group(2).replace('[', '').replace(']', ''))
+        
+        translations = [numbered.get(i) for i in range(1, expected + 1)]
+        if any(not translation for translation in translations):
+            return None, None
+        
+        short_text = short_part.replace('[', '').replace(']', '').strip() or None
+        
+        return translations, short_text
+    
+    def _build_prompt(self, text: str, current_short: Optional[str] = None) -> str:
         """
         Build prompt for AI processing.
         
         Args:
             text: Original text
+            current_short: Short version of an earlier revision to repeat
+                if still accurate (edits)
             
         Returns:
             Formatted prompt
         """
+        if config.SHORT_VERSION_MODE == 'local':
+            # The short version is extracted locally from the full version
+            return f"""Process this social media post:
+
+Original text:
+{text}
+
+Tasks:
+1. If the text is in Vietnamese, translate it to English
+2. Improve the writing style to be engaging and professional
+3. Keep the main message and meaning intact
+4. Keep placeholders such as {{U1}}, {{M1}} and {{H1}} exactly as written (they stand for links, mentions and hashtags)
+
+FULL VERSION:
+[Write the full improved/translated version here]
+
+Format your response EXACTLY as shown above with the section header."""
+        
+        short_instructions = "Write a concise version (max 240 characters) with relevant hashtags. The total length including hashtags must not exceed 280 characters for Twitter"
+        if current_short:
+            # Edits: a reworded short version would replace the tweet
+            short_instructions = (
+                "The post was edited. "
+                f"The current short version is: {current_short}\n"
+                "Repeat it EXACTLY if it is still accurate; otherwise rewrite it "
+                "(max 240 characters with hashtags, never over 280 characters)"
+            )
         return f"""Process this social media post:
 
 Original text:
@@ -131,7 +684,7 @@ Tasks:
 1. If the text is in Vietnamese, translate it to English
 2. Improve the writing style to be engaging and professional
 3. Keep the main message and meaning intact
-4. Preserve any links or URLs as-is
+4. Keep placeholders such as {{U1}}, {{M1}} and {{H1}} exactly as written (they stand for links, mentions and hashtags)
 
 Provide TWO versions:
 
@@ -139,22 +692,45 @@ FULL VERSION:
 [Write the full improved/translated version here]
 
 SHORT VERSION:
-[Write a concise version (max 240 characters) with relevant hashtags. The total length including hashtags must not exceed 280 characters for Twitter]
+[{short_instructions}]
 
 Format your response EXACTLY as shown above with clear section headers."""
     
-    async def _generate_image_description(self) -> Dict[str, str]:
+    async def _generate_image_description(
+        self,
+        image_path: Optional[Path] = None,
+        style: Optional[str] = None
+    ) -> Dict[str, str]:
         """
         Generate description for image-only message.
         
+        Args:
+            image_path: Image to describe; a low-detail thumbnail is sent
+            style: Per-route style instructions
+            
         Returns:
             Dictionary with generated descriptions
         """
         try:
-            prompt = """Generate a short, engaging social media caption for an image.
+            thumbnail = None
+            image_hash = None
+            if image_path:
+                thumbnail = await self.image_handler.create_thumbnail(
+                    image_path,
+                    config.VISION_THUMBNAIL_SIZE
+                )
+            
+            if thumbnail:
+                image_bytes, image_hash = thumbnail
+                cached = self._get_cached_caption(image_hash, style or '')
+                if cached:
+                    logger.info(f"Caption cache hit for image hash {image_hash:016x}")
+                    return dict(cached)
+            
+            prompt = """Generate a short, engaging social media caption for this image.
 
 Requirements:
-1. Create an interesting caption (2-3 sentences)
+1. Create an interesting caption (2-3 sentences) describing what the image shows
 2. Add relevant hashtags
 
 Provide TWO versions:
@@ -165,16 +741,26 @@ FULL VERSION:
 SHORT VERSION:
 [Write a concise version (max 240 characters) with hashtags. Total length must not exceed 280 characters]"""
 
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            user_content = prompt
+            if thumbnail:
+                encoded = base64.b64encode(image_bytes).decode('ascii')
+                user_content = [
+                    {"type": "text", "text": prompt},
                     {
-                        "role": "system",
-                        "content": "You are a creative social media content creator."
-                    },
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:image/jpeg;base64,{encoded}",
+                            "detail": config.VISION_DETAIL
+                        }
+                    }
+                ]
+            
+            response = await self._complete(
+                messages=[
+                    self._system_message("You are a creative social media content creator.", style),
                     {
                         "role": "user",
-                        "content": prompt
+                        "content": user_content
                     }
                 ],
                 temperature=0.8,
@@ -183,11 +769,16 @@ SHORT VERSION:
             
             result = response.choices[0].message.content.strip()
             full_text, short_text = self._parse_response(result)
+            short_text = truncate_weighted(short_text) if short_text else self._create_short_version(full_text)
             
-            return {
+            caption = {
                 'full_text': full_text,
                 'short_text': short_text
             }
+            if image_hash is not None:
+                self._cache_caption(image_hash, style or '', caption)
+            
+            return caption
             
         except Exception as e:
             logger.error(f"Failed to generate image description: {e}")
@@ -196,7 +787,32 @@ SHORT VERSION:
                 'short_text': "Xem hình ảnh này! 📸 #photo #image"
             }
     
-    def _parse_response(self, response: str) -> tuple[str, str]:
+    def _get_cached_caption(self, image_hash: int, style: str) -> Optional[Dict[str, str]]:
+        """
+        Find a caption generated for a visually identical image.
+        
+        Args:
+            image_hash: 64-bit difference hash of the image
+            style: Prompt style the caption must have been written in
+            
+        Returns:
+            Cached caption or None
+        """
+        for key, caption in self._caption_cache.items():
+            cached_style, cached_hash = key
+            if cached_style == style and bin(cached_hash ^ image_hash).count('1') <= config.VISION_HASH_DISTANCE:
+                self._caption_cache.move_to_end(key)
+                return caption
+        return None
+    
+    def _cache_caption(self, image_hash: int, style: str, caption: Dict[str, str]):
+        """Store a caption, evicting the least recently used entries."""
+        self._caption_cache[(style, image_hash)] = caption
+        self._caption_cache.move_to_end((style, image_hash))
+        while len(self._caption_cache) > config.VISION_CAPTION_CACHE_SIZE:
+            self._caption_cache.popitem(last=False)
+    
+    def _parse_response(self, response: str) -> tuple[str, Optional[str]]:
         """
         Parse AI response into full and short versions.
         
@@ -204,7 +820,8 @@ SHORT VERSION:
             response: AI response text
             
         Returns:
-            Tuple of (full_text, short_text)
+            Tuple of (full_text, short_text); short_text is None when the
+            response has no short version (the caller builds one locally)
         """
         try:
             # Split by sections
@@ -218,37 +835,25 @@ SHORT VERSION:
                 full_text = full_part.replace('[', '').replace(']', '').strip()
                 short_text = short_part.replace('[', '').replace(']', '').strip()
                 
-                # Ensure short text is not too long
-                if len(short_text) > 280:
-                    short_text = short_text[:277] + '...'
-                
                 return full_text, short_text
             
-            # Fallback if parsing fails
-            return response, self._create_short_version(response)
+            # Fallback if parsing fails (or no short version was requested)
+            full_text = response.replace('FULL VERSION:', '').replace('[', '').replace(']', '').strip()
+            return full_text, None
             
         except Exception as e:
             logger.error(f"Failed to parse AI response: {e}")
-            return response, self._create_short_version(response)
+            return response, None
     
     def _create_short_version(self, text: str) -> str:
         """
-        Create a short version of text as fallback.
+        Create a short version of text locally (fallback and local mode).
         
         Args:
-            text: Original text
+            text: Full text
             
         Returns:
-            Shortened text with hashtags
+            Most central sentences with keyword hashtags, within 280
+            weighted characters
         """
-        # Take first 240 characters
-        short = text[:240]
-        
-        # Add generic hashtags
-        short += " #content #social"
-        
-        # Ensure it's not too long
-        if len(short) > 280:
-            short = short[:277] + "..."
-        
-        return short
+        return build_short_version(text, max_hashtags=config.SHORT_VERSION_MAX_HASHTAGS)
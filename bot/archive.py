@@ -0,0 +1,223 @@
+"""Append-only archive of published posts with full-text search."""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_COLUMNS = (
+    'created_at', 'route', 'chat_id', 'message_id', 'original_text', 'cleaned_text',
+    'full_text', 'short_text', 'media_hash', 'telegram_message_id', 'tweet_url',
+    'telegram_success', 'twitter_success', 'prompt_tokens', 'completion_tokens', 'timings'
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    route TEXT,
+    chat_id INTEGER,
+    message_id INTEGER,
+    original_text TEXT NOT NULL DEFAULT '',
+    cleaned_text TEXT NOT NULL DEFAULT '',
+    full_text TEXT NOT NULL DEFAULT '',
+    short_text TEXT NOT NULL DEFAULT '',
+    media_hash TEXT,
+    telegram_message_id INTEGER,
+    tweet_url TEXT,
+    telegram_success INTEGER NOT NULL DEFAULT 0,
+    twitter_success INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    timings TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    cleaned_text, full_text, short_text,
+    content='posts', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts (rowid, cleaned_text, full_text, short_text)
+    VALUES (new.id, new.cleaned_text, new.full_text, new.short_text);
+END;
+"""
+
+# Sentinel telling the writer thread to flush and exit
+_STOP = object()
+
+
+def fts_query(text: str) -> str:
+    """Quote every word so user input is never parsed as FTS5 syntax."""
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+
+def _placeholders(values: Sequence) -> str:
+    """Parameter list for an SQL IN clause."""
+    return ', '.join('?' for _ in values)
+
+
+class PostArchive:
+    """Archive writes are queued and committed in batches by a background thread."""
+
+    def __init__(self, db_path: Path, batch_size: int = 50, flush_interval: float = 2.0):
+        """
+        Initialize archive.
+
+        Args:
+            db_path: SQLite database file
+            batch_size: Maximum posts written in one transaction
+            flush_interval: Maximum seconds a queued post waits before it is written
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._queue: 'queue.Queue[Any]' = queue.Queue()
+        self._lock = threading.Lock()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name='post-archive', daemon=True)
+        self._writer.start()
+
+    def record(self, post: Dict[str, Any]):
+        """
+        Queue a published post for archiving (never blocks on disk).
+
+        Args:
+            post: Post fields; 'usage' token counts and a 'timings' dict are
+                flattened into their columns
+        """
+        usage = post.get('usage') or {}
+        row = dict(post)
+        row.setdefault('created_at', time.time())
+        row['prompt_tokens'] = usage.get('prompt_tokens', 0)
+        row['completion_tokens'] = usage.get('completion_tokens', 0)
+        row['timings'] = json.dumps(post['timings']) if post.get('timings') else None
+        for field in ('original_text', 'cleaned_text', 'full_text', 'short_text'):
+            row[field] = row.get(field) or ''
+        for field in ('telegram_success', 'twitter_success'):
+            row[field] = int(bool(row.get(field)))
+        self._queue.put(tuple(row.get(column) for column in _COLUMNS))
+
+    def close(self):
+        """Write everything still queued and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_loop(self):
+        """Collect queued posts and commit them in batches."""
+        conn = sqlite3.connect(str(self.db_path))
+        statement = f"INSERT INTO posts ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})"
+        stopping = False
+        while not stopping:
+            batch: List[Tuple] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if not batch:
+                continue
+            try:
+                with conn:
+                    conn.executemany(statement, batch)
+                self.written += len(batch)
+                logger.debug(f"Archived {len(batch)} posts")
+            except sqlite3.Error as e:
+                logger.error(f"Failed to archive {len(batch)} posts: {e}")
+        conn.close()
+
+    def _page(self, sql: str, params: Tuple, page_size: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Run a newest-first query and return (rows, id to continue before)."""
+        with self._lock:
+            rows = [dict(row) for row in self.conn.execute(sql, (*params, page_size + 1))]
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            return rows, rows[-1]['id']
+        return rows, None
+
+    def recent(
+        self,
+        routes: Sequence[str],
+        before_id: Optional[int] = None,
+        page_size: int = 5
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        List archived posts, newest first.
+
+        Args:
+            routes: Names of the routes whose posts may be listed
+            before_id: Only return posts older than this id (next page)
+            page_size: Posts per page
+
+        Returns:
+            Tuple of (posts, before_id of the next page or None)
+        """
+        if not routes:
+            return [], None
+        return self._page(
+            f'SELECT * FROM posts WHERE id < ? AND route IN ({_placeholders(routes)}) ORDER BY id DESC LIMIT ?',
+            (before_id or 2 ** 63 - 1, *routes),
+            page_size
+        )
+
+    def search(
+        self,
+        routes: Sequence[str],
+        text: str,
+        before_id: Optional[int] = None,
+        page_size: int = 5
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Full-text search over source and published texts, newest first.
+
+        Args:
+            routes: Names of the routes whose posts may be listed
+            text: Words to search for (all must match; diacritics ignored)
+            before_id: Only return posts older than this id (next page)
+            page_size: Posts per page
+
+        Returns:
+            Tuple of (posts, before_id of the next page or None)
+        """
+        query = fts_query(text)
+        if not query or not routes:
+            return [], None
+        return self._page(
+            'SELECT posts.* FROM posts_fts JOIN posts ON posts.id = posts_fts.rowid '
+            f'WHERE posts_fts MATCH ? AND posts_fts.rowid < ? AND posts.route IN ({_placeholders(routes)}) '
+            'ORDER BY posts_fts.rowid DESC LIMIT ?',
+            (query, before_id or 2 ** 63 - 1, *routes),
+            page_size
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """Archive size and writer counters for metrics."""
+        with self._lock:
+            total = self.conn.execute('SELECT MAX(id) FROM posts').fetchone()[0] or 0
+        return {
+            'posts': total,
+            'written': self.written,
+            'queued': self._queue.qsize(),
+        }
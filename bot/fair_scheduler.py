@@ -0,0 +1,124 @@
+"""Round-robin scheduling of posts across routes."""
+
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+
+class Slot:
+    """Place of a post in its route's queue, reserved before its work is known."""
+
+    def __init__(self, scheduler: 'FairScheduler', route: str):
+        self.scheduler = scheduler
+        self.route = route
+        self.factory: Optional[Callable[[], Awaitable[Any]]] = None
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    async def run(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Fill the slot and wait for its turn and result.
+
+        Args:
+            factory: Callable returning the coroutine to run
+
+        Returns:
+            Result of the coroutine
+        """
+        self.factory = factory
+        self.scheduler._dispatch()
+        return await self.future
+
+    def release(self):
+        """Give up a slot that was never run, so later posts are not held back."""
+        if self.factory is None and not self.future.done():
+            self.future.cancel()
+            self.scheduler._dispatch()
+
+
+class FairScheduler:
+    """Run posts with a global limit, serving routes in turn so none starves."""
+
+    def __init__(self, max_concurrent: int = 8, per_route: int = 1):
+        """
+        Initialize scheduler.
+
+        Args:
+            max_concurrent: Posts processed at once across all routes
+            per_route: Posts processed at once per route (1 keeps order)
+        """
+        self.max_concurrent = max_concurrent
+        self.per_route = per_route
+        self._queues: 'OrderedDict[str, Deque[Slot]]' = OrderedDict()
+        self._running: Dict[str, int] = {}
+        self._total_running = 0
+
+    def reserve(self, route: str) -> Slot:
+        """
+        Take a place in a route's queue right away.
+
+        Call it before the first await of an update handler: updates are
+        handled concurrently, and the slot keeps the post in arrival order
+        while its status reply and download are still in flight.
+
+        Args:
+            route: Route name
+
+        Returns:
+            Slot to run the post in (or release)
+        """
+        slot = Slot(self, route)
+        self._queues.setdefault(route, deque()).append(slot)
+        return slot
+
+    def _dispatch(self):
+        """Start queued posts, one route at a time in round-robin order."""
+        progressed = True
+        while self._total_running < self.max_concurrent and progressed:
+            progressed = False
+            for route in list(self._queues):
+                if self._total_running >= self.max_concurrent:
+                    break
+                if self._running.get(route, 0) >= self.per_route:
+                    continue
+
+                queue = self._queues[route]
+                slot = queue[0]
+                # A reserved slot still waiting for its work holds back later posts
+                if slot.factory is None and not slot.future.done():
+                    continue
+
+                queue.popleft()
+                # Served routes go to the back of the line
+                if queue:
+                    self._queues.move_to_end(route)
+                else:
+                    del self._queues[route]
+
+                progressed = True
+                if slot.future.done():
+                    continue
+
+                self._start(route, slot.factory, slot.future)
+
+    def _start(self, route: str, factory: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        """Run one post as a task and settle its future when done."""
+        self._running[route] = self._running.get(route, 0) + 1
+        self._total_running += 1
+        task = asyncio.ensure_future(factory())
+
+        def _done(task: asyncio.Task):
+            self._running[route] -= 1
+            if not self._running[route]:
+                del self._running[route]
+            self._total_running -= 1
+
+            if not future.done():
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception():
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result())
+            self._dispatch()
+
+        task.add_done_callback(_done)
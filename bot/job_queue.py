@@ -0,0 +1,227 @@
+"""SQLite-backed job queue for handing posts to worker processes."""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class JobQueue:
+    """Durable local queue; no external broker required."""
+
+    def __init__(self, db_path: Path, max_attempts: int = 2):
+        """
+        Initialize job queue.
+
+        Args:
+            db_path: SQLite database file shared by all processes
+            max_attempts: Times a job is retried after its worker crashed
+        """
+        self.max_attempts = max_attempts
+        # The intake process calls in from worker threads (asyncio.to_thread)
+        self._lock = threading.Lock()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly where needed
+        self.conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                payload TEXT NOT NULL,
+                stage TEXT,
+                checkpoint TEXT,
+                result TEXT,
+                error TEXT,
+                worker INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+        if 'checkpoint' not in columns:
+            # Queues created before steps were checkpointed
+            self.conn.execute('ALTER TABLE jobs ADD COLUMN checkpoint TEXT')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)')
+
+    def put(self, payload: Dict[str, Any]) -> int:
+        """
+        Enqueue a job.
+
+        Args:
+            payload: JSON-serializable job description
+
+        Returns:
+            Job id
+        """
+        with self._lock:
+            now = time.time()
+            cursor = self.conn.execute(
+                'INSERT INTO jobs (payload, created_at, updated_at) VALUES (?, ?, ?)',
+                (json.dumps(payload, ensure_ascii=False), now, now)
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker: int) -> Optional[Tuple[int, Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """
+        Atomically take the oldest pending job.
+
+        Args:
+            worker: Process id of the claiming worker
+
+        Returns:
+            Tuple of (job id, payload, checkpoint of an earlier attempt or
+            None) or None if the queue is empty
+        """
+        with self._lock:
+            # Plain read first: empty polls never take the write lock
+            if self.conn.execute("SELECT 1 FROM jobs WHERE status = 'pending' LIMIT 1").fetchone() is None:
+                return None
+
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.conn.execute(
+                    "SELECT id, payload, checkpoint FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row:
+                    self.conn.execute(
+                        """
+                        UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1,
+                            updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (worker, time.time(), row[0])
+                    )
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+            if not row:
+                return None
+            return row[0], json.loads(row[1]), json.loads(row[2]) if row[2] else None
+
+    def set_stage(self, job_id: int, stage: str):
+        """Record the current processing stage of a job."""
+        with self._lock:
+            self.conn.execute(
+                'UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ?',
+                (stage, time.time(), job_id)
+            )
+
+    def save_checkpoint(self, job_id: int, checkpoint: Dict[str, Any]):
+        """
+        Record the steps a job has finished (AI result, published ids).
+
+        A retried job resumes from its checkpoint instead of publishing again.
+        """
+        with self._lock:
+            self.conn.execute(
+                'UPDATE jobs SET checkpoint = ?, updated_at = ? WHERE id = ?',
+                (json.dumps(checkpoint, ensure_ascii=False), time.time(), job_id)
+            )
+
+    def complete(self, job_id: int, result: Dict[str, Any]):
+        """Mark a job as done and store its result."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id)
+            )
+
+    def fail(self, job_id: int, error: str):
+        """Mark a job as failed."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def requeue_worker(self, worker: int) -> int:
+        """
+        Return the jobs of a crashed worker to the queue.
+
+        Jobs that already used all attempts are marked as failed. Retried
+        jobs keep their checkpoint, so finished publish steps are skipped.
+
+        Args:
+            worker: Process id of the dead worker
+
+        Returns:
+            Number of jobs put back as pending
+        """
+        with self._lock:
+            now = time.time()
+            self.conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', error = 'Worker crashed', updated_at = ?
+                WHERE status = 'running' AND worker = ? AND attempts >= ?
+                """,
+                (now, worker, self.max_attempts)
+            )
+            cursor = self.conn.execute(
+                """
+                UPDATE jobs SET status = 'pending', worker = NULL, updated_at = ?
+                WHERE status = 'running' AND worker = ?
+                """,
+                (now, worker)
+            )
+            return cursor.rowcount
+
+    def requeue_running(self) -> int:
+        """Put back jobs left running by a previous intake process (checkpoints are kept)."""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'pending', worker = NULL, updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def fetch(self, job_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Read the state of the given jobs.
+
+        Args:
+            job_ids: Jobs to look up
+
+        Returns:
+            List of dicts with 'id', 'status', 'stage', 'result' and 'error'
+        """
+        with self._lock:
+            job_ids = list(job_ids)
+            if not job_ids:
+                return []
+
+            placeholders = ','.join('?' * len(job_ids))
+            rows = self.conn.execute(
+                f'SELECT id, status, stage, result, error FROM jobs WHERE id IN ({placeholders})',
+                job_ids
+            ).fetchall()
+            return [
+                {
+                    'id': job_id,
+                    'status': status,
+                    'stage': stage,
+                    'result': json.loads(result) if result else None,
+                    'error': error,
+                }
+                for job_id, status, stage, result, error in rows
+            ]
+
+    def purge_finished(self) -> int:
+        """Remove done/failed jobs nobody is waiting for anymore."""
+        with self._lock:
+            cursor = self.conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed')")
+            return cursor.rowcount
+
+    def delete(self, job_ids: Iterable[int]):
+        """Remove finished jobs."""
+        with self._lock:
+            self.conn.executemany('DELETE FROM jobs WHERE id = ?', [(job_id,) for job_id in job_ids])
@@ -0,0 +1,256 @@
+"""Publishing pipeline shared by the in-process handler and worker processes."""
+
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+from config import config
+from utils.logger import setup_logger
+from utils import ImageHandler, Deadline
+from bot.ai_processor import AIProcessor
+from bot.publisher_pool import PublisherPool
+from bot.router import Route, Router
+
+logger = setup_logger(__name__)
+
+
+class PublishPipeline:
+    """Optimize media, process text with AI and publish to all destinations."""
+
+    def __init__(self, router: Router):
+        """
+        Initialize pipeline clients.
+
+        Args:
+            router: Routing table used to resolve destinations
+        """
+        self.router = router
+        self.image_handler = ImageHandler()
+        self.ai_processor = AIProcessor()
+        self.publishers = PublisherPool(router)
+
+    async def run(
+        self,
+        route: Route,
+        text: str,
+        entities: Optional[Sequence] = None,
+        image_path: Optional[Path] = None,
+        has_image: bool = False,
+        progress: Optional[Callable[[str], None]] = None,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Process and publish one post.
+
+        Steps finished by an earlier attempt (see checkpoint) are skipped,
+        so a retried job never publishes the same post twice.
+
+        Args:
+            route: Destination channel, Twitter account and prompt style
+            text: Original message text or caption
+            entities: Telegram message entities for the text
+            image_path: Downloaded image (owned and removed by the caller)
+            has_image: Whether the message had a photo (even if download failed)
+            progress: Optional callback receiving status updates
+            checkpoint: Steps finished by an earlier attempt of the same job
+            on_checkpoint: Optional callback receiving the checkpoint after
+                every finished step, to persist it
+
+        Returns:
+            Dictionary with 'full_text', 'short_text', 'telegram_success',
+            'twitter_success' and 'twitter_url' keys, plus the fields kept
+            for edit propagation ('telegram_message_id', 'tweet_id',
+            'has_media', 'cleaned_text' and 'segments') and the archive
+            ('media_hash', 'usage' and per-stage 'timings' in seconds), and
+            'degradations' listing stages that fell back to meet the deadline
+        """
+        report = progress or (lambda status: None)
+        done = dict(checkpoint or {})
+        save = on_checkpoint or (lambda state: None)
+        deadline = Deadline(config.POST_DEADLINE) if config.POST_DEADLINE > 0 else None
+        timings: Dict[str, float] = {}
+        started = stage_started = time.monotonic()
+
+        def _stage_done(stage: str):
+            nonlocal stage_started
+            now = time.monotonic()
+            timings[stage] = round(now - stage_started, 3)
+            stage_started = now
+
+        # The optimized copy is released on every code path
+        with self.image_handler.storage.scope() as scope:
+            media_hash = None
+            if image_path:
+                media_hash = await self.image_handler.compute_hash(image_path)
+                # Optimize image for social media
+                image_path = await self.image_handler.optimize(image_path, scope=scope, deadline=deadline)
+                _stage_done('image')
+
+            # Process text with AI
+            processed = done.get('ai')
+            if processed is None:
+                report("🤖 Đang xử lý bằng AI...")
+                processed = await self.ai_processor.process_message(
+                    text,
+                    has_image=has_image or image_path is not None,
+                    entities=entities,
+                    image_path=image_path,
+                    style=route.prompt_style,
+                    deadline=deadline
+                )
+                done['ai'] = {key: processed.get(key) for key in ('full_text', 'short_text', 'segments', 'usage')}
+                save(done)
+            _stage_done('ai')
+
+            full_text = processed['full_text']
+            short_text = processed['short_text']
+
+            logger.info(f"Full text ({len(full_text)} chars): {full_text[:100]}...")
+            logger.info(f"Short text ({len(short_text)} chars): {short_text}")
+
+            # Publish to Telegram channel
+            if 'telegram' in done:
+                telegram_message_id, with_media = done['telegram']
+            else:
+                report("📤 Đang đăng lên Telegram...")
+                telegram_publisher = self.publishers.telegram(route.telegram_channel)
+                telegram_message_id, with_media = await telegram_publisher.publish(full_text, image_path, deadline=deadline)
+                done['telegram'] = [telegram_message_id, with_media]
+                save(done)
+            _stage_done('telegram')
+
+            # Publish to Twitter
+            if 'twitter' in done:
+                tweet_id, twitter_url = done['twitter']
+            else:
+                report("🐦 Đang đăng lên Twitter...")
+                twitter_publisher = self.publishers.twitter(route.twitter_account)
+                tweet_id, twitter_url = await twitter_publisher.publish(short_text, image_path, deadline=deadline)
+                done['twitter'] = [tweet_id, twitter_url]
+                save(done)
+            _stage_done('twitter')
+            timings['total'] = round(time.monotonic() - started, 3)
+
+            doc = self.ai_processor.preprocessor.process(text, entities)
+            return {
+                'full_text': full_text,
+                'short_text': short_text,
+                'telegram_success': telegram_message_id is not None,
+                'twitter_success': tweet_id is not None,
+                'twitter_url': twitter_url,
+                'telegram_message_id': telegram_message_id,
+                'tweet_id': tweet_id,
+                'has_media': with_media,
+                'cleaned_text': doc.restore(doc.text),
+                'segments': processed.get('segments'),
+                'media_hash': media_hash,
+                'usage': processed.get('usage'),
+                'timings': timings,
+                'degradations': deadline.degradations if deadline else [],
+            }
+
+    async def update(
+        self,
+        route: Route,
+        post: Dict[str, Any],
+        text: str,
+        entities: Optional[Sequence] = None,
+        photo_file_id: Optional[str] = None,
+        progress: Optional[Callable[[str], None]] = None,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Propagate an edit of the source message to a published post.
+
+        The channel message is edited in place; the tweet is replaced only
+        when the short version changed. Steps finished by an earlier
+        attempt (see checkpoint) are skipped.
+
+        Args:
+            route: Route the post was published to
+            post: Stored record of the published post (see PostStore)
+            text: Edited message text or caption
+            entities: Telegram message entities for the text
+            photo_file_id: Telegram file id of the message's photo; it is
+                downloaded only if the tweet is replaced
+            progress: Optional callback receiving status updates
+            checkpoint: Steps finished by an earlier attempt of the same job
+            on_checkpoint: Optional callback receiving the checkpoint after
+                every finished step, to persist it
+
+        Returns:
+            Updated post record with 'telegram_updated', 'twitter_replaced'
+            and 'incremental' keys
+        """
+        report = progress or (lambda status: None)
+        done = dict(checkpoint or {})
+        save = on_checkpoint or (lambda state: None)
+
+        with self.image_handler.storage.scope() as scope:
+            processed = done.get('ai')
+            if processed is None:
+                report("🤖 Đang xử lý nội dung đã sửa...")
+                processed = await self.ai_processor.reprocess_edit(
+                    post, text, entities=entities, style=route.prompt_style
+                )
+                done['ai'] = {
+                    key: processed.get(key)
+                    for key in ('full_text', 'short_text', 'cleaned_text', 'segments', 'incremental')
+                }
+                save(done)
+
+            updated = dict(post)
+            updated.update(
+                full_text=processed['full_text'],
+                short_text=processed['short_text'],
+                cleaned_text=processed['cleaned_text'],
+                segments=processed.get('segments'),
+                incremental=processed['incremental'],
+                telegram_updated=False,
+                twitter_replaced=False
+            )
+
+            if post.get('telegram_message_id') and processed['full_text'] != post.get('full_text'):
+                if 'telegram' in done:
+                    updated['telegram_updated'] = done['telegram']
+                else:
+                    report("📤 Đang cập nhật bài trên Telegram...")
+                    telegram_publisher = self.publishers.telegram(route.telegram_channel)
+                    updated['telegram_updated'] = await telegram_publisher.edit(
+                        post['telegram_message_id'], processed['full_text'], has_media=post.get('has_media', False)
+                    )
+                    done['telegram'] = updated['telegram_updated']
+                    save(done)
+                if not updated['telegram_updated']:
+                    # Keep what the channel still shows so the next edit diffs against it
+                    updated.update(
+                        full_text=post.get('full_text'),
+                        cleaned_text=post.get('cleaned_text'),
+                        segments=post.get('segments')
+                    )
+
+            if post.get('tweet_id') and processed['short_text'] != post.get('short_text'):
+                if 'twitter' in done:
+                    tweet_id, twitter_url = done['twitter']
+                else:
+                    report("🐦 Đang thay thế tweet...")
+                    image_path = None
+                    if photo_file_id:
+                        file = await self.publishers.bot.get_file(photo_file_id)
+                        image_path = await self.image_handler.download_image(file, photo_file_id, scope)
+                        if image_path:
+                            image_path = await self.image_handler.optimize(image_path, scope=scope)
+                    twitter_publisher = self.publishers.twitter(route.twitter_account)
+                    tweet_id, twitter_url = await twitter_publisher.replace(
+                        post['tweet_id'], processed['short_text'], image_path
+                    )
+                    done['twitter'] = [tweet_id, twitter_url]
+                    save(done)
+                if tweet_id:
+                    updated.update(tweet_id=tweet_id, twitter_url=twitter_url, twitter_replaced=True)
+                else:
+                    # The old tweet is still up with the old text
+                    updated['short_text'] = post.get('short_text')
+
+            return updated
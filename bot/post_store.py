@@ -0,0 +1,105 @@
+"""Persistent mapping from source messages to published posts."""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Result fields kept for each published post
+_FIELDS = (
+    'route', 'telegram_message_id', 'tweet_id', 'twitter_url', 'has_media',
+    'cleaned_text', 'full_text', 'short_text', 'segments'
+)
+
+
+class PostStore:
+    """Remember where each source message was published so edits can follow."""
+
+    def __init__(self, db_path: Path):
+        """
+        Initialize post store.
+
+        Args:
+            db_path: SQLite database file
+        """
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                chat_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                route TEXT NOT NULL,
+                telegram_message_id INTEGER,
+                tweet_id TEXT,
+                twitter_url TEXT,
+                has_media INTEGER NOT NULL DEFAULT 0,
+                cleaned_text TEXT NOT NULL DEFAULT '',
+                full_text TEXT NOT NULL DEFAULT '',
+                short_text TEXT NOT NULL DEFAULT '',
+                segments TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (chat_id, message_id)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def save(self, chat_id: int, message_id: int, post: Dict[str, Any]):
+        """
+        Insert or update the record of a published post.
+
+        Args:
+            chat_id: Chat of the source message
+            message_id: Id of the source message
+            post: Values for the stored fields (missing ones become NULL)
+        """
+        values = [post.get(field) for field in _FIELDS]
+        values[_FIELDS.index('has_media')] = int(bool(post.get('has_media')))
+        segments = post.get('segments')
+        values[_FIELDS.index('segments')] = json.dumps(segments, ensure_ascii=False) if segments else None
+        for field in ('cleaned_text', 'full_text', 'short_text'):
+            values[_FIELDS.index(field)] = post.get(field) or ''
+
+        now = time.time()
+        columns = ', '.join(_FIELDS)
+        updates = ', '.join(f"{field} = excluded.{field}" for field in _FIELDS)
+        with self._lock:
+            self.conn.execute(
+                f"""
+                INSERT INTO posts (chat_id, message_id, {columns}, created_at, updated_at)
+                VALUES (?, ?, {', '.join('?' for _ in _FIELDS)}, ?, ?)
+                ON CONFLICT (chat_id, message_id) DO UPDATE SET {updates}, updated_at = excluded.updated_at
+                """,
+                (chat_id, message_id, *values, now, now)
+            )
+            self.conn.commit()
+
+    def get(self, chat_id: int, message_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Look up the published post of a source message.
+
+        Args:
+            chat_id: Chat of the source message
+            message_id: Id of the source message
+
+        Returns:
+            Stored fields or None if the message was never published
+        """
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM posts WHERE chat_id = ? AND message_id = ?",
+                (chat_id, message_id)
+            ).fetchone()
+
+        if row is None:
+            return None
+        post = dict(zip(_FIELDS, row))
+        post['has_media'] = bool(post['has_media'])
+        post['segments'] = json.loads(post['segments']) if post['segments'] else None
+        return post
@@ -0,0 +1,115 @@
+"""Coalesced, non-blocking status message updates."""
+
+import asyncio
+from typing import Optional
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter, TelegramError
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class ProgressReporter:
+    """Edit a status message in the background, at most once per interval."""
+
+    def __init__(self, message: Message, min_interval: float = 1.0):
+        """
+        Initialize progress reporter.
+
+        Args:
+            message: Status message to keep editing
+            min_interval: Minimum seconds between two edits
+        """
+        self.message = message
+        self.min_interval = min_interval
+        self._current = message.text
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._editing = False
+        self._finished = False
+        # The status message was just sent, so debounce from now
+        self._last_edit = asyncio.get_running_loop().time()
+
+    def update(self, text: str):
+        """
+        Schedule a progress update without waiting for it.
+
+        Only the latest state is kept; intermediate states that become
+        stale before the next edit slot are dropped.
+
+        Args:
+            text: New status text
+        """
+        if self._finished:
+            return
+
+        self._pending = text
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    async def finish(self, text: str, **kwargs):
+        """
+        Deliver the final status, replacing any pending update.
+
+        Args:
+            text: Final status text
+            **kwargs: Extra arguments for edit_text (parse_mode, ...)
+        """
+        self._finished = True
+        self._pending = None
+
+        if self._task and not self._task.done():
+            if self._editing:
+                # Let the in-flight edit land first so it cannot overwrite ours
+                await asyncio.gather(self._task, return_exceptions=True)
+            else:
+                self._task.cancel()
+
+        try:
+            await self._edit(text, **kwargs)
+        except RetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+            await self._edit(text, **kwargs)
+
+    def cancel(self):
+        """Stop sending updates (e.g. when the handler failed)."""
+        self._finished = True
+        self._pending = None
+        if self._task and not self._task.done() and not self._editing:
+            self._task.cancel()
+
+    async def _flush(self):
+        """Send pending updates, respecting the minimum interval."""
+        loop = asyncio.get_running_loop()
+        while self._pending is not None and not self._finished:
+            delay = self._last_edit + self.min_interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            text, self._pending = self._pending, None
+            try:
+                await self._edit(text)
+            except RetryAfter as e:
+                logger.debug(f"Progress update throttled for {e.retry_after}s")
+                self._last_edit = loop.time() + e.retry_after
+                if self._pending is None:
+                    self._pending = text
+            except TelegramError as e:
+                logger.debug(f"Progress update failed: {e}")
+
+    async def _edit(self, text: str, **kwargs):
+        """Edit the status message unless the text is unchanged."""
+        if text == self._current and not kwargs:
+            return
+
+        self._editing = True
+        try:
+            await self.message.edit_text(text, **kwargs)
+            self._current = text
+        except BadRequest as e:
+            if 'not modified' not in str(e).lower():
+                raise
+        finally:
+            self._editing = False
+            self._last_edit = asyncio.get_running_loop().time()
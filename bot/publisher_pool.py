@@ -0,0 +1,40 @@
+"""Lazily created, shared publisher clients for all routes."""
+
+from typing import Dict
+from telegram import Bot
+from config import config
+from utils.logger import setup_logger
+from bot.router import Router
+from bot.telegram_publisher import TelegramPublisher
+from bot.twitter_publisher import TwitterPublisher
+
+logger = setup_logger(__name__)
+
+
+class PublisherPool:
+    """One Telegram Bot for every channel, one Twitter client per account."""
+
+    def __init__(self, router: Router):
+        """
+        Initialize publisher pool.
+
+        Args:
+            router: Routing table holding the Twitter account credentials
+        """
+        self.router = router
+        self.bot = Bot(token=config.TELEGRAM_BOT_TOKEN)
+        self._telegram: Dict[str, TelegramPublisher] = {}
+        self._twitter: Dict[str, TwitterPublisher] = {}
+
+    def telegram(self, channel_id: str) -> TelegramPublisher:
+        """Return the publisher for a Telegram channel."""
+        if channel_id not in self._telegram:
+            self._telegram[channel_id] = TelegramPublisher(channel_id, bot=self.bot)
+        return self._telegram[channel_id]
+
+    def twitter(self, account: str) -> TwitterPublisher:
+        """Return the publisher for a Twitter account, creating it on first use."""
+        if account not in self._twitter:
+            logger.info(f"Creating Twitter client for account '{account}'")
+            self._twitter[account] = TwitterPublisher(self.router.twitter_accounts[account])
+        return self._twitter[account]
@@ -0,0 +1,159 @@
+"""Route messages from senders/source chats to channels and Twitter accounts."""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from config import config
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_ACCOUNT = 'default'
+TWITTER_CREDENTIAL_KEYS = ('api_key', 'api_secret', 'access_token', 'access_secret', 'bearer_token')
+
+
+class Route:
+    """One brand: who may post, where it goes and how it is written."""
+
+    def __init__(
+        self,
+        name: str,
+        telegram_channel: str,
+        twitter_account: str = DEFAULT_ACCOUNT,
+        senders: Optional[List[int]] = None,
+        source_chats: Optional[List[int]] = None,
+        prompt_style: Optional[str] = None
+    ):
+        """
+        Initialize route.
+
+        Args:
+            name: Unique route name
+            telegram_channel: Destination channel id or @username
+            twitter_account: Key into the Twitter account table
+            senders: Telegram user ids allowed to post to this route
+            source_chats: Chat ids of forwarded messages that select this route
+            prompt_style: Extra style instructions for the AI prompt
+        """
+        self.name = name
+        self.telegram_channel = telegram_channel
+        self.twitter_account = twitter_account
+        self.senders: Set[int] = set(senders or [])
+        self.source_chats: Set[int] = set(source_chats or [])
+        self.prompt_style = prompt_style
+
+    def __repr__(self) -> str:
+        return f"Route({self.name!r} -> {self.telegram_channel}, @{self.twitter_account})"
+
+
+class Router:
+    """Routing table loaded from ROUTES_FILE (or built from the .env defaults)."""
+
+    def __init__(self, routes: List[Route], twitter_accounts: Dict[str, Dict[str, str]]):
+        """
+        Initialize router.
+
+        Args:
+            routes: Routes in priority order
+            twitter_accounts: Account name -> credential dict
+        """
+        self.routes = routes
+        self.twitter_accounts = twitter_accounts
+        self._by_name = {route.name: route for route in routes}
+
+        for route in routes:
+            if route.twitter_account not in twitter_accounts:
+                raise ValueError(f"Route '{route.name}' uses unknown Twitter account '{route.twitter_account}'")
+
+    @classmethod
+    def from_config(cls) -> 'Router':
+        """Build the router from ROUTES_FILE, or a single default route."""
+        if config.ROUTES_FILE:
+            return cls.from_file(Path(config.ROUTES_FILE))
+
+        route = Route(
+            name=DEFAULT_ACCOUNT,
+            telegram_channel=config.TELEGRAM_CHANNEL_ID,
+            senders=[int(config.AUTHORIZED_USER_ID)]
+        )
+        return cls([route], {DEFAULT_ACCOUNT: config.twitter_credentials()})
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'Router':
+        """
+        Load a routing table from JSON.
+
+        Credential values may reference environment variables as ${NAME}.
+
+        Args:
+            path: Path to the routes file
+
+        Returns:
+            Router instance
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data: Dict[str, Any] = json.load(f)
+
+        twitter_accounts = {
+            name: {key: os.path.expandvars(str(credentials.get(key, ''))) for key in TWITTER_CREDENTIAL_KEYS}
+            for name, credentials in data.get('twitter_accounts', {}).items()
+        }
+        if DEFAULT_ACCOUNT not in twitter_accounts and config.TWITTER_API_KEY:
+            twitter_accounts[DEFAULT_ACCOUNT] = config.twitter_credentials()
+
+        routes = [
+            Route(
+                name=item['name'],
+                telegram_channel=item['telegram_channel'],
+                twitter_account=item.get('twitter_account', DEFAULT_ACCOUNT),
+                senders=[int(user_id) for user_id in item.get('senders', [])],
+                source_chats=[int(chat_id) for chat_id in item.get('source_chats', [])],
+                prompt_style=item.get('prompt_style')
+            )
+            for item in data.get('routes', [])
+        ]
+
+        logger.info(f"Loaded {len(routes)} routes and {len(twitter_accounts)} Twitter accounts from {path}")
+        return cls(routes, twitter_accounts)
+
+    @property
+    def authorized_user_ids(self) -> Set[int]:
+        """All user ids that may send posts."""
+        user_ids: Set[int] = set()
+        for route in self.routes:
+            user_ids |= route.senders
+        return user_ids
+
+    def routes_for(self, sender_id: Optional[int]) -> List[Route]:
+        """Routes a user may post to (and so see the archived posts of)."""
+        return [route for route in self.routes if not route.senders or sender_id in route.senders]
+
+    def get(self, name: str) -> Optional[Route]:
+        """Look up a route by name."""
+        return self._by_name.get(name)
+
+    def match(self, sender_id: Optional[int], source_chat_id: Optional[int] = None) -> Optional[Route]:
+        """
+        Pick the route for a message.
+
+        Routes bound to the forwarded message's source chat win over
+        routes bound only to the sender.
+
+        Args:
+            sender_id: Telegram user id of the sender
+            source_chat_id: Chat id the message was forwarded from
+
+        Returns:
+            Matching route or None
+        """
+        if source_chat_id is not None:
+            for route in self.routes:
+                if source_chat_id in route.source_chats and (not route.senders or sender_id in route.senders):
+                    return route
+
+        for route in self.routes:
+            if not route.source_chats and sender_id in route.senders:
+                return route
+
+        return None
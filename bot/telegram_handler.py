@@ -1,24 +1,36 @@
 """Telegram bot handler for receiving messages."""
 
-from typing import Optional
+import asyncio
+import html
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 from pathlib import Path
-from telegram import Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     Application,
     MessageHandler,
     CommandHandler,
+    CallbackQueryHandler,
     ContextTypes,
     filters
 )
 from config import config
 from utils.logger import setup_logger
-from utils import ImageHandler
-from bot.ai_processor import AIProcessor
-from bot.telegram_publisher import TelegramPublisher
-from bot.twitter_publisher import TwitterPublisher
+from utils import ImageHandler, LoopWatchdog, temp_storage
+from bot.archive import PostArchive
+from bot.pipeline import PublishPipeline
+from bot.post_store import PostStore
+from bot.router import Route, Router
+from bot.fair_scheduler import FairScheduler
+from bot.progress_reporter import ProgressReporter
+from bot.worker_pool import WorkerPool
 
 logger = setup_logger(__name__)
 
+# Search queries remembered per user for "next page" buttons
+_ARCHIVE_QUERIES_KEPT = 20
+
 
 class TelegramHandler:
     """Handle incoming Telegram messages and orchestrate publishing."""
@@ -26,23 +38,83 @@ class TelegramHandler:
     def __init__(self):
         """Initialize Telegram handler."""
         self.image_handler = ImageHandler()
-        self.ai_processor = AIProcessor()
-        self.telegram_publisher = TelegramPublisher()
-        self.twitter_publisher = TwitterPublisher()
+        self.router = Router.from_config()
+        self.scheduler = FairScheduler(config.MAX_CONCURRENT_POSTS, config.ROUTE_MAX_CONCURRENT)
+        self.watchdog: Optional[LoopWatchdog] = None
+        if config.LOOP_WATCHDOG_ENABLED:
+            self.watchdog = LoopWatchdog(config.LOOP_STALL_THRESHOLD)
+        # Where each source message was published, so edits can follow
+        self.post_store = PostStore(config.POST_STORE_PATH)
+        self.archive: Optional[PostArchive] = None
+        if config.ARCHIVE_ENABLED:
+            self.archive = PostArchive(
+                config.ARCHIVE_PATH,
+                batch_size=config.ARCHIVE_BATCH_SIZE,
+                flush_interval=config.ARCHIVE_FLUSH_INTERVAL
+            )
+        
+        # Either process posts in this process or hand them to workers
+        self.pipeline: Optional[PublishPipeline] = None
+        self.worker_pool: Optional[WorkerPool] = None
+        if config.WORKER_PROCESSES > 0:
+            self.worker_pool = WorkerPool(config.WORKER_PROCESSES, config.JOB_QUEUE_PATH)
+        else:
+            self.pipeline = PublishPipeline(self.router)
         
         # Build application
-        self.application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+        self.application = (
+            Application.builder()
+            .token(config.TELEGRAM_BOT_TOKEN)
+            # Posts of different routes are interleaved by the FairScheduler,
+            # which keeps each route's posts in arrival order
+            .concurrent_updates(True)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         
         # Add handlers
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
+        if self.archive:
+            authorized = filters.User(user_id=self.router.authorized_user_ids)
+            self.application.add_handler(CommandHandler("recent", self.recent_command, filters=authorized))
+            self.application.add_handler(CommandHandler("search", self.search_command, filters=authorized))
+            self.application.add_handler(CallbackQueryHandler(self.handle_archive_page, pattern=r'^archive:'))
         self.application.add_handler(
             MessageHandler(
-                filters.User(user_id=int(config.AUTHORIZED_USER_ID)) & 
+                filters.UpdateType.MESSAGE &
+                filters.User(user_id=self.router.authorized_user_ids) & 
                 (filters.TEXT | filters.PHOTO),
                 self.handle_message
             )
         )
+        if config.EDIT_SYNC_ENABLED:
+            self.application.add_handler(
+                MessageHandler(
+                    filters.UpdateType.EDITED_MESSAGE &
+                    filters.User(user_id=self.router.authorized_user_ids) &
+                    (filters.TEXT | filters.PHOTO),
+                    self.handle_edit
+                )
+            )
+    
+    async def _post_init(self, application: Application):
+        """Sweep orphaned temp files, start the loop watchdog and worker processes."""
+        temp_storage.sweep()
+        if self.watchdog:
+            self.watchdog.start()
+        if self.worker_pool:
+            await self.worker_pool.start()
+    
+    async def _post_shutdown(self, application: Application):
+        """Stop worker processes and the watchdog, and flush the archive."""
+        if self.watchdog:
+            self.watchdog.stop()
+        if self.worker_pool:
+            await self.worker_pool.stop()
+        if self.archive:
+            await asyncio.to_thread(self.archive.close)
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command."""
@@ -72,6 +144,9 @@ class TelegramHandler:
             "• Tin nhắn văn bản\n"
             "• Tin nhắn có hình ảnh\n"
             "• Chỉ hình ảnh (AI sẽ tạo chú thích)\n\n"
+            "<b>Lệnh:</b>\n"
+            "• /recent - Các bài đã đăng gần đây\n"
+            "• /search từ khóa - Tìm bài đã đăng\n\n"
             "<b>Không hỗ trợ:</b>\n"
             "• Video\n"
             "• Nhiều hình ảnh (chỉ dùng hình đầu tiên)\n"
@@ -88,17 +163,36 @@ class TelegramHandler:
             update: Telegram update object
             context: Telegram context object
         """
+        progress: Optional[ProgressReporter] = None
+        # Downloaded files live until the post is fully handled
+        scope = temp_storage.scope()
+        
+        # Extract message content
+        text = update.message.text or update.message.caption or ""
+        entities = update.message.entities or update.message.caption_entities
+        has_photo = bool(update.message.photo)
+        
+        # Pick destination by sender and forwarded source chat
+        source_chat = update.message.forward_from_chat
+        route = self.router.match(
+            update.effective_user.id,
+            source_chat.id if source_chat else None
+        )
+        # Updates are handled concurrently: take the route's place in line
+        # before the first await so posts are published in arrival order
+        slot = self.scheduler.reserve(route.name) if route and (text or has_photo) else None
         try:
             # Send processing notification
             status_msg = await update.message.reply_text("⏳ Đang xử lý tin nhắn của bạn...")
-            
-            # Extract message content
-            text = update.message.text or update.message.caption or ""
-            has_photo = bool(update.message.photo)
+            progress = ProgressReporter(status_msg, config.PROGRESS_UPDATE_INTERVAL)
             
             # Check if message has content
             if not text and not has_photo:
-                await status_msg.edit_text("❌ Không có nội dung để đăng. Vui lòng gửi văn bản và/hoặc hình ảnh.")
+                await progress.finish("❌ Không có nội dung để đăng. Vui lòng gửi văn bản và/hoặc hình ảnh.")
+                return
+            
+            if route is None:
+                await progress.finish("❌ Không tìm thấy tuyến đăng bài cho tin nhắn này.")
                 return
             
             # Download image if present
@@ -106,33 +200,36 @@ class TelegramHandler:
             if has_photo:
                 photo = update.message.photo[-1]  # Get largest size
                 file = await context.bot.get_file(photo.file_id)
-                image_path = await self.image_handler.download_image(file, photo.file_id)
-                
-                if image_path:
-                    # Optimize image for social media
-                    image_path = self.image_handler.optimize_image(image_path)
-            
-            # Process text with AI
-            await status_msg.edit_text("🤖 Đang xử lý bằng AI...")
-            processed = await self.ai_processor.process_message(text, has_image=has_photo)
-            
-            full_text = processed['full_text']
-            short_text = processed['short_text']
+                image_path = await self.image_handler.download_image(file, photo.file_id, scope)
             
-            logger.info(f"Full text ({len(full_text)} chars): {full_text[:100]}...")
-            logger.info(f"Short text ({len(short_text)} chars): {short_text}")
+            async def publish() -> dict:
+                result = await self._process(route, text, entities, image_path, has_photo, progress)
+                # Stored before the slot is freed, so an edit queued behind
+                # this post finds it
+                if result['telegram_success'] or result['twitter_success']:
+                    await asyncio.to_thread(
+                        self.post_store.save,
+                        update.message.chat_id,
+                        update.message.message_id,
+                        dict(result, route=route.name)
+                    )
+                    if self.archive:
+                        self.archive.record(dict(
+                            result,
+                            route=route.name,
+                            chat_id=update.message.chat_id,
+                            message_id=update.message.message_id,
+                            original_text=text
+                        ))
+                return result
             
-            # Publish to Telegram channel
-            await status_msg.edit_text("📤 Đang đăng lên Telegram...")
-            telegram_success = await self.telegram_publisher.publish(full_text, image_path)
+            result = await slot.run(publish)
             
-            # Publish to Twitter
-            await status_msg.edit_text("🐦 Đang đăng lên Twitter...")
-            twitter_success, twitter_url = await self.twitter_publisher.publish(short_text, image_path)
-            
-            # Cleanup temporary files
-            if image_path:
-                self.image_handler.cleanup(image_path)
+            full_text = result['full_text']
+            short_text = result['short_text']
+            telegram_success = result['telegram_success']
+            twitter_success = result['twitter_success']
+            twitter_url = result['twitter_url']
             
             # Build final status message
             status_parts = []
@@ -158,12 +255,19 @@ class TelegramHandler:
                 f"🐦 Văn bản ngắn: {len(short_text)} ký tự"
             ]
             
+            # Stages that fell back to stay within the deadline
+            degradations = result.get('degradations') or []
+            if degradations:
+                message_lines.append("")
+                message_lines.append("⏱ <b>Rút gọn để kịp thời hạn:</b>")
+                message_lines.extend(f"• {html.escape(entry)}" for entry in degradations)
+            
             # Add Twitter link if available
             if twitter_success and twitter_url:
                 message_lines.append("")
                 message_lines.append(f"🔗 <a href=\"{twitter_url}\">Xem tweet trên Twitter</a>")
             
-            await status_msg.edit_text(
+            await progress.finish(
                 "\n".join(message_lines),
                 parse_mode='HTML',
                 disable_web_page_preview=False
@@ -171,24 +275,270 @@ class TelegramHandler:
             
         except Exception as e:
             logger.error(f"Error handling message: {e}", exc_info=True)
+            if progress:
+                progress.cancel()
             try:
                 await update.message.reply_text(f"❌ Lỗi: {str(e)}")
             except:
                 pass
+        finally:
+            if slot:
+                slot.release()
+            scope.release()
+    
+    async def handle_edit(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Propagate an edited source message to the post published from it.
+        
+        Args:
+            update: Telegram update object
+            context: Telegram context object
+        """
+        message = update.edited_message
+        source_chat = message.forward_from_chat
+        route = self.router.match(
+            update.effective_user.id,
+            source_chat.id if source_chat else None
+        )
+        if route is None:
+            logger.info(f"Edited message {message.message_id} matches no route, ignoring")
+            return
+        
+        progress: Optional[ProgressReporter] = None
+        # Queued behind the original post (and earlier edits) of the route,
+        # so the post is looked up only after it has been stored
+        slot = self.scheduler.reserve(route.name)
+        
+        async def update_post() -> Optional[dict]:
+            nonlocal progress
+            post = await asyncio.to_thread(self.post_store.get, message.chat_id, message.message_id)
+            if post is None:
+                logger.info(f"Edited message {message.message_id} was never published, ignoring")
+                return None
+            
+            # The post keeps the route it was published through
+            post_route = self.router.get(post['route'])
+            if post_route is None:
+                logger.warning(f"Route '{post['route']}' of edited message {message.message_id} no longer exists")
+                return None
+            
+            status_msg = await message.reply_text("✏️ Đang cập nhật bài đã đăng...")
+            progress = ProgressReporter(status_msg, config.PROGRESS_UPDATE_INTERVAL)
+            
+            text = message.text or message.caption or ""
+            entities = message.entities or message.caption_entities
+            
+            # Downloaded by the pipeline only if the tweet has to be replaced
+            photo_file_id = message.photo[-1].file_id if message.photo else None
+            
+            updated = await self._process_edit(post_route, post, text, entities, photo_file_id, progress)
+            await asyncio.to_thread(self.post_store.save, message.chat_id, message.message_id, updated)
+            return updated
+        
+        try:
+            updated = await slot.run(update_post)
+            if updated is None:
+                return
+            
+            telegram_status = "✅ Telegram: đã sửa" if updated['telegram_updated'] else "➖ Telegram: không đổi"
+            twitter_status = "✅ Twitter: đã thay tweet" if updated['twitter_replaced'] else "➖ Twitter: không đổi"
+            message_lines = [
+                "<b>Cập nhật hoàn tất!</b>",
+                "",
+                f"{telegram_status} | {twitter_status}",
+            ]
+            if updated['incremental']:
+                message_lines.append("♻️ Chỉ dịch lại các dòng đã sửa")
+            if updated['twitter_replaced'] and updated.get('twitter_url'):
+                message_lines.append("")
+                message_lines.append(f"🔗 <a href=\"{updated['twitter_url']}\">Xem tweet mới trên Twitter</a>")
+            
+            await progress.finish(
+                "\n".join(message_lines),
+                parse_mode='HTML',
+                disable_web_page_preview=False
+            )
+            
+        except Exception as e:
+            logger.error(f"Error handling edited message: {e}", exc_info=True)
+            if progress:
+                progress.cancel()
+            try:
+                await message.reply_text(f"❌ Lỗi cập nhật: {str(e)}")
+            except:
+                pass
+        finally:
+            slot.release()
+    
+    async def _process_edit(
+        self,
+        route: Route,
+        post: dict,
+        text: str,
+        entities,
+        photo_file_id: Optional[str],
+        progress: ProgressReporter
+    ) -> dict:
+        """Update a published post in this process or via a worker."""
+        if self.worker_pool:
+            return await self.worker_pool.submit(
+                {
+                    'kind': 'edit',
+                    'route': route.name,
+                    'post': post,
+                    'text': text,
+                    'entities': [entity.to_dict() for entity in entities or ()],
+                    'photo_file_id': photo_file_id,
+                },
+                progress=progress.update
+            )
+        
+        return await self.pipeline.update(
+            route,
+            post,
+            text,
+            entities=entities,
+            photo_file_id=photo_file_id,
+            progress=progress.update
+        )
+    
+    async def recent_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /recent command: list the latest published posts."""
+        await self._send_archive_page(update, context, 'recent', None)
+    
+    async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /search command: full-text search over published posts."""
+        query = ' '.join(context.args or ())
+        if not query:
+            await update.message.reply_text("🔎 Cách dùng: /search từ khóa")
+            return
+        # Callback data is limited to 64 bytes, so the query stays here,
+        # keyed by the /search message so every result list pages its own query
+        queries = context.user_data.setdefault('archive_queries', OrderedDict())
+        token = str(update.message.message_id)
+        queries[token] = query
+        while len(queries) > _ARCHIVE_QUERIES_KEPT:
+            queries.popitem(last=False)
+        await self._send_archive_page(update, context, 'search', None, token)
+    
+    async def handle_archive_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Show the next page of /recent or /search results."""
+        callback = update.callback_query
+        if update.effective_user.id not in self.router.authorized_user_ids:
+            await callback.answer()
+            return
+        
+        # archive:<kind>:<before_id>:<query token> (buttons sent before
+        # tokens existed have no token and count as expired searches)
+        _, kind, before_id, *rest = callback.data.split(':', 3)
+        token = rest[0] if rest else ''
+        await callback.answer()
+        await self._send_archive_page(update, context, kind, int(before_id), token)
+    
+    async def _send_archive_page(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        kind: str,
+        before_id: Optional[int],
+        token: str = ''
+    ):
+        """
+        Send one page of archive results, with a button for the next page.
+        
+        Args:
+            update: Telegram update (command or button press)
+            context: Telegram context object
+            kind: 'recent' or 'search'
+            before_id: Show posts older than this id (None = newest)
+            token: Key of the stored search query
+        """
+        page_size = config.ARCHIVE_PAGE_SIZE
+        # Users only see posts of the routes they publish through
+        routes = [route.name for route in self.router.routes_for(update.effective_user.id)]
+        if kind == 'search':
+            query = context.user_data.get('archive_queries', {}).get(token)
+            if query is None:
+                await update.effective_message.reply_text("⌛ Kết quả tìm kiếm đã hết hạn, vui lòng /search lại.")
+                return
+            posts, next_id = await asyncio.to_thread(self.archive.search, routes, query, before_id, page_size)
+            title = f"🔎 <b>Kết quả cho</b> \"{html.escape(query)}\""
+        else:
+            posts, next_id = await asyncio.to_thread(self.archive.recent, routes, before_id, page_size)
+            title = "🗂 <b>Bài đăng gần đây</b>"
+        
+        text = self._format_archive_page(title, posts)
+        markup = None
+        if next_id:
+            markup = InlineKeyboardMarkup([[
+                InlineKeyboardButton("Trang sau ▶", callback_data=f"archive:{kind}:{next_id}:{token}")
+            ]])
+        
+        await update.effective_message.reply_text(
+            text,
+            parse_mode='HTML',
+            reply_markup=markup,
+            disable_web_page_preview=True
+        )
+    
+    @staticmethod
+    def _format_archive_page(title: str, posts: List[Dict[str, Any]]) -> str:
+        """Render archived posts as an HTML message."""
+        if not posts:
+            return f"{title}\n\nKhông tìm thấy bài đăng nào."
+        
+        lines = [title]
+        for post in posts:
+            created = datetime.fromtimestamp(post['created_at']).strftime('%d/%m/%Y %H:%M')
+            preview = post['short_text'] or post['full_text']
+            if len(preview) > 200:
+                preview = preview[:197] + '...'
+            lines.append("")
+            lines.append(f"<b>#{post['id']}</b> · {created} · {html.escape(post['route'] or '')}")
+            lines.append(html.escape(preview))
+            if post['tweet_url']:
+                lines.append(f"🔗 <a href=\"{html.escape(post['tweet_url'])}\">Tweet</a>")
+        return "\n".join(lines)
+    
+    async def _process(
+        self,
+        route: Route,
+        text: str,
+        entities,
+        image_path: Optional[Path],
+        has_photo: bool,
+        progress: ProgressReporter
+    ) -> dict:
+        """Run the pipeline in this process or hand the post to a worker."""
+        if self.worker_pool:
+            return await self.worker_pool.submit(
+                {
+                    'route': route.name,
+                    'text': text,
+                    'entities': [entity.to_dict() for entity in entities or ()],
+                    'image_path': str(image_path) if image_path else None,
+                    'has_image': has_photo,
+                },
+                progress=progress.update
+            )
+        
+        return await self.pipeline.run(
+            route,
+            text,
+            entities=entities,
+            image_path=image_path,
+            has_image=has_photo,
+            progress=progress.update
+        )
     
     def run(self):
         """Run the bot."""
         logger.info("🚀 Đang khởi động bot...")
-        logger.info(f"📢 Kênh: {config.TELEGRAM_CHANNEL_ID}")
-        logger.info(f"👤 Người dùng được ủy quyền: {config.AUTHORIZED_USER_ID}")
+        for route in self.router.routes:
+            logger.info(f"📢 Tuyến {route.name}: kênh {route.telegram_channel}, Twitter '{route.twitter_account}'")
+        logger.info(f"👤 Người dùng được ủy quyền: {', '.join(map(str, sorted(self.router.authorized_user_ids)))}")
         
-        # Test Twitter connection
-        try:
-            success, message = self.twitter_publisher.test_connection()
-            logger.info(message)
-            if not success:
-                logger.warning("⚠️ Twitter có thể không hoạt động. Kiểm tra cấu hình OAuth 1.0a trong Twitter Developer Portal.")
-        except Exception as e:
-            logger.warning(f"⚠️ Không thể kiểm tra kết nối Twitter: {e}")
+        if self.worker_pool:
+            logger.info(f"👷 Chế độ đa tiến trình: {config.WORKER_PROCESSES} worker")
         
         self.application.run_polling(allowed_updates=Update.ALL_TYPES)
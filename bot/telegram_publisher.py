@@ -1,59 +1,145 @@
 """Telegram channel publisher module."""
 
+import asyncio
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
+import httpx
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import BadRequest, TelegramError, TimedOut
 from config import config
 from utils.logger import setup_logger
+from utils.deadline import MEDIA_UPLOAD_SHARE, Deadline, stage_timeout
 
 logger = setup_logger(__name__)
 
+# Timeouts raised before the request was fully sent; read timeouts are
+# not among them, as Telegram may have posted the message and answered late
+_NOT_SENT_TIMEOUTS = (httpx.ConnectTimeout, httpx.WriteTimeout, httpx.PoolTimeout)
+
 
 class TelegramPublisher:
     """Publish content to Telegram channel."""
     
-    def __init__(self):
-        """Initialize Telegram publisher."""
-        self.bot = Bot(token=config.TELEGRAM_BOT_TOKEN)
-        self.channel_id = config.TELEGRAM_CHANNEL_ID
+    def __init__(self, channel_id: Optional[str] = None, bot: Optional[Bot] = None):
+        """
+        Initialize Telegram publisher.
+        
+        Args:
+            channel_id: Destination channel; defaults to TELEGRAM_CHANNEL_ID
+            bot: Shared Bot instance; a new one is created if omitted
+        """
+        self.bot = bot or Bot(token=config.TELEGRAM_BOT_TOKEN)
+        self.channel_id = channel_id or config.TELEGRAM_CHANNEL_ID
     
-    async def publish(self, text: str, image_path: Optional[Path] = None) -> bool:
+    async def publish(
+        self,
+        text: str,
+        image_path: Optional[Path] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[Optional[int], bool]:
         """
         Publish message to Telegram channel.
         
         Args:
             text: Message text
             image_path: Optional path to image
+            deadline: Post deadline; the photo is dropped when its upload
+                overruns the Telegram slice
             
         Returns:
-            True if published successfully, False otherwise
+            Tuple of (id of the channel message, or None if not published;
+            whether the photo went out with it)
         """
         try:
             if image_path and image_path.exists():
                 # Publish with image
-                with open(image_path, 'rb') as image_file:
-                    await self.bot.send_photo(
-                        chat_id=self.channel_id,
-                        photo=image_file,
-                        caption=text,
-                        parse_mode='HTML'
-                    )
-                logger.info(f"✅ Published to Telegram with image: {self.channel_id}")
-            else:
-                # Publish text only
-                await self.bot.send_message(
+                upload_timeouts = {}
+                if deadline:
+                    upload_timeouts['write_timeout'] = deadline.budget('telegram') * MEDIA_UPLOAD_SHARE
+                try:
+                    with open(image_path, 'rb') as image_file:
+                        message = await asyncio.wait_for(
+                            self.bot.send_photo(
+                                chat_id=self.channel_id,
+                                photo=image_file,
+                                caption=text,
+                                parse_mode='HTML',
+                                **upload_timeouts
+                            ),
+                            stage_timeout(deadline, 'telegram')
+                        )
+                    logger.info(f"✅ Published to Telegram with image: {self.channel_id}")
+                    return message.message_id, True
+                except TimedOut as e:
+                    if deadline is None:
+                        raise
+                    if not isinstance(e.__cause__, _NOT_SENT_TIMEOUTS):
+                        # Posting the text as well could publish the post twice
+                        deadline.degrade('telegram', "photo upload unconfirmed, not re-sent as text")
+                        return None, False
+                    deadline.degrade('telegram', "photo upload timed out, sent text only")
+            
+            # Publish text only
+            message = await asyncio.wait_for(
+                self.bot.send_message(
                     chat_id=self.channel_id,
                     text=text,
                     parse_mode='HTML'
-                )
-                logger.info(f"✅ Published to Telegram: {self.channel_id}")
+                ),
+                stage_timeout(deadline, 'telegram')
+            )
+            logger.info(f"✅ Published to Telegram: {self.channel_id}")
+            return message.message_id, False
             
+        except asyncio.TimeoutError:
+            # The request may have reached Telegram before the slice ran out
+            deadline.degrade('telegram', "timed out, publishing unconfirmed")
+            return None, False
+        except TelegramError as e:
+            logger.error(f"❌ Failed to publish to Telegram: {e}")
+            return None, False
+        except Exception as e:
+            logger.error(f"❌ Unexpected error publishing to Telegram: {e}")
+            return None, False
+    
+    async def edit(self, message_id: int, text: str, has_media: bool = False) -> bool:
+        """
+        Update a published channel message in place.
+        
+        Args:
+            message_id: Id returned by publish
+            text: New message text
+            has_media: Whether the message is a photo (its caption is edited)
+            
+        Returns:
+            True if the message now shows the text, False otherwise
+        """
+        try:
+            if has_media:
+                await self.bot.edit_message_caption(
+                    chat_id=self.channel_id,
+                    message_id=message_id,
+                    caption=text,
+                    parse_mode='HTML'
+                )
+            else:
+                await self.bot.edit_message_text(
+                    text=text,
+                    chat_id=self.channel_id,
+                    message_id=message_id,
+                    parse_mode='HTML'
+                )
+            logger.info(f"✅ Updated Telegram message {message_id} in {self.channel_id}")
             return True
             
+        except BadRequest as e:
+            if 'not modified' in str(e).lower():
+                return True
+            logger.error(f"❌ Failed to update Telegram message {message_id}: {e}")
+            return False
         except TelegramError as e:
-            logger.error(f"❌ Failed to publish to Telegram: {e}")
+            logger.error(f"❌ Failed to update Telegram message {message_id}: {e}")
             return False
         except Exception as e:
-            logger.error(f"❌ Unexpected error publishing to Telegram: {e}")
+            logger.error(f"❌ Unexpected error updating Telegram message {message_id}: {e}")
             return False
@@ -0,0 +1,237 @@
+"""Segment-level translation memory backed by SQLite."""
+
+import re
+import sqlite3
+import threading
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from utils.text_preprocessor import PLACEHOLDER_RE
+
+_DIGITS_RE = re.compile(r'\d+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_segment(segment: str) -> str:
+    """Normalize a segment for lookups (case and whitespace insensitive)."""
+    return _WHITESPACE_RE.sub(' ', segment).strip().lower()
+
+
+def canonicalize_placeholders(segment: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Renumber placeholders so the same boilerplate matches across messages.
+
+    Args:
+        segment: Segment containing placeholders such as {U3}
+
+    Returns:
+        Tuple of (canonical segment, mapping canonical -> original placeholder)
+    """
+    mapping: Dict[str, str] = {}
+    reverse: Dict[str, str] = {}
+    counters: Dict[str, int] = {}
+
+    def _replace(match):
+        original = match.group(0)
+        if original not in reverse:
+            kind = match.group(1)
+            counters[kind] = counters.get(kind, 0) + 1
+            canonical = f"{{{kind}{counters[kind]}}}"
+            reverse[original] = canonical
+            mapping[canonical] = original
+        return reverse[original]
+
+    return PLACEHOLDER_RE.sub(_replace, segment), mapping
+
+
+def apply_placeholder_mapping(text: str, mapping: Dict[str, str]) -> str:
+    """Map canonical placeholders back to the message's own placeholders."""
+    if not mapping:
+        return text
+    return PLACEHOLDER_RE.sub(lambda m: mapping.get(m.group(0), m.group(0)), text)
+
+
+class TranslationMemory:
+    """
+    Store source -> English segment translations with exact and fuzzy lookup.
+
+    Only exact hits may be reused as-is. A fuzzy hit is the translation
+    of a *different* sentence (another city, "new" instead of "old"...)
+    and is meant as a reference for the model, never for publishing.
+    """
+
+    def __init__(self, db_path: Path, fuzzy_threshold: float = 0.9, max_candidates: int = 50):
+        """
+        Initialize translation memory.
+
+        Args:
+            db_path: SQLite database file
+            fuzzy_threshold: Minimum similarity ratio for a fuzzy hit (0-1)
+            max_candidates: Maximum rows compared during a fuzzy lookup
+        """
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_candidates = max_candidates
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS segments (
+                key TEXT PRIMARY KEY,
+                translation TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                prefix TEXT NOT NULL,
+                suffix TEXT NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_segments_prefix ON segments (prefix, length)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_segments_suffix ON segments (suffix, length)')
+        self.conn.commit()
+
+    @staticmethod
+    def _edges(key: str) -> Tuple[str, str]:
+        """Return the first and last two words used to narrow fuzzy candidates."""
+        words = key.split(' ')
+        return ' '.join(words[:2]), ' '.join(words[-2:])
+
+    @staticmethod
+    def _key(segment: str, namespace: str) -> str:
+        """Build the lookup key; namespaces keep per-style translations apart."""
+        key = normalize_segment(segment)
+        if key and namespace:
+            key = f"{namespace}:{key}"
+        return key
+
+    def lookup(self, segments: Sequence[str], namespace: str = '') -> List[Optional[Tuple[str, bool]]]:
+        """
+        Find stored translations for the segments of one message.
+
+        Use counters of all hits are updated in a single transaction.
+        Blocking; call it through asyncio.to_thread from the event loop.
+
+        Args:
+            segments: Source segments (with canonical placeholders)
+            namespace: Scope of the translations (e.g. a prompt style)
+
+        Returns:
+            For every segment (stored translation, exact) or None; inexact
+            translations belong to a similar segment, not this one
+        """
+        results: List[Optional[Tuple[str, bool]]] = []
+        used: List[Tuple[str]] = []
+        with self._lock:
+            for segment in segments:
+                key = self._key(segment, namespace)
+                if not key:
+                    results.append(None)
+                    continue
+
+                row = self.conn.execute(
+                    'SELECT key, translation FROM segments WHERE key = ?', (key,)
+                ).fetchone()
+                exact = row is not None
+
+                if row is None and self.fuzzy_threshold < 1:
+                    row = self._fuzzy_lookup(key)
+
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+
+                if exact:
+                    self.hits += 1
+                    used.append((row[0],))
+                else:
+                    self.fuzzy_hits += 1
+                results.append((row[1], exact))
+
+            if used:
+                with self.conn:
+                    self.conn.executemany('UPDATE segments SET uses = uses + 1 WHERE key = ?', used)
+        return results
+
+    def _fuzzy_lookup(self, key: str) -> Optional[Tuple[str, str]]:
+        """Return the most similar stored segment above the threshold."""
+        prefix, suffix = self._edges(key)
+        slack = max(3, int(len(key) * (1 - self.fuzzy_threshold)))
+        candidates = self.conn.execute(
+            """
+            SELECT key, translation FROM segments
+            WHERE (prefix = ? OR suffix = ?) AND length BETWEEN ? AND ?
+            LIMIT ?
+            """,
+            (prefix, suffix, len(key) - slack, len(key) + slack, self.max_candidates)
+        ).fetchall()
+
+        # Numbers (prices, dates, times) must match exactly
+        digits = _DIGITS_RE.findall(key)
+        best, best_ratio = None, self.fuzzy_threshold
+        for candidate_key, translation in candidates:
+            if _DIGITS_RE.findall(candidate_key) != digits:
+                continue
+            ratio = SequenceMatcher(None, key, candidate_key).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = (candidate_key, translation), ratio
+
+        return best
+
+    def store(self, translations: Sequence[Tuple[str, str]], namespace: str = ''):
+        """
+        Save the segment translations of one message in a single transaction.
+
+        Blocking; call it through asyncio.to_thread from the event loop.
+
+        Args:
+            translations: (source segment with canonical placeholders,
+                English translation) pairs
+            namespace: Scope of the translations (e.g. a prompt style)
+        """
+        now = time.time()
+        rows = []
+        for segment, translation in translations:
+            key = self._key(segment, namespace)
+            if key and translation:
+                prefix, suffix = self._edges(key)
+                rows.append((key, translation, len(key), prefix, suffix, now))
+        if not rows:
+            return
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO segments (key, translation, length, prefix, suffix, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    translation = excluded.translation,
+                    updated_at = excluded.updated_at
+                """,
+                rows
+            )
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of looked-up segments served from memory (exact hits)."""
+        total = self.hits + self.fuzzy_hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return lookup counters and store size."""
+        with self._lock:
+            size = self.conn.execute('SELECT COUNT(*) FROM segments').fetchone()[0]
+        return {
+            'hits': self.hits,
+            'fuzzy_hits': self.fuzzy_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 4),
+            'segments': size,
+        }
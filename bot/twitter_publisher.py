@@ -1,10 +1,13 @@
 """Twitter publisher module."""
 
+import asyncio
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 import tweepy
 from config import config
 from utils.logger import setup_logger
+from utils.deadline import MEDIA_UPLOAD_SHARE, Deadline, stage_timeout
+from utils.summarizer import truncate_weighted, twitter_length
 
 logger = setup_logger(__name__)
 
@@ -12,25 +15,36 @@ logger = setup_logger(__name__)
 class TwitterPublisher:
     """Publish content to Twitter."""
     
-    def __init__(self):
-        """Initialize Twitter publisher."""
+    def __init__(self, credentials: Optional[Dict[str, str]] = None):
+        """
+        Initialize Twitter publisher.
+        
+        Args:
+            credentials: Account credentials (api_key, api_secret,
+                access_token, access_secret, bearer_token); defaults to .env
+        """
+        credentials = credentials or config.twitter_credentials()
+        
         # Twitter API v2 client
         self.client = tweepy.Client(
-            bearer_token=config.TWITTER_BEARER_TOKEN,
-            consumer_key=config.TWITTER_API_KEY,
-            consumer_secret=config.TWITTER_API_SECRET,
-            access_token=config.TWITTER_ACCESS_TOKEN,
-            access_token_secret=config.TWITTER_ACCESS_SECRET
+            bearer_token=credentials['bearer_token'],
+            consumer_key=credentials['api_key'],
+            consumer_secret=credentials['api_secret'],
+            access_token=credentials['access_token'],
+            access_token_secret=credentials['access_secret']
         )
         
         # API v1.1 for media upload
         auth = tweepy.OAuth1UserHandler(
-            config.TWITTER_API_KEY,
-            config.TWITTER_API_SECRET,
-            config.TWITTER_ACCESS_TOKEN,
-            config.TWITTER_ACCESS_SECRET
+            credentials['api_key'],
+            credentials['api_secret'],
+            credentials['access_token'],
+            credentials['access_secret']
         )
         self.api = tweepy.API(auth)
+        
+        # Username of the account, fetched once to build tweet URLs
+        self.username: Optional[str] = None
     
     def test_connection(self) -> tuple[bool, str]:
         """
@@ -43,6 +57,7 @@ class TwitterPublisher:
             # Try to get user info to verify permissions
             me = self.client.get_me()
             if me.data:
+                self.username = me.data.username
                 return True, f"✅ Kết nối Twitter thành công: @{me.data.username}"
             return False, "❌ Không thể xác thực với Twitter API"
         except tweepy.TweepyException as e:
@@ -53,60 +68,89 @@ class TwitterPublisher:
         except Exception as e:
             return False, f"❌ Lỗi không xác định: {str(e)}"
     
-    async def publish(self, text: str, image_path: Optional[Path] = None) -> tuple[bool, Optional[str]]:
+    async def _tweet_url(self, tweet_id: str) -> Optional[str]:
+        """
+        Build the URL of a tweet, looking the username up only once.
+
+        The lookup doubles as the account's connection test, so accounts
+        are checked on first use instead of all at startup.
+        """
+        if not self.username:
+            success, message = await asyncio.to_thread(self.test_connection)
+            logger.info(message)
+            if not success:
+                logger.warning("⚠️ Twitter có thể không hoạt động. Kiểm tra cấu hình OAuth 1.0a trong Twitter Developer Portal.")
+        
+        if self.username:
+            return f"https://twitter.com/{self.username}/status/{tweet_id}"
+        return None
+    
+    async def publish(
+        self,
+        text: str,
+        image_path: Optional[Path] = None,
+        deadline: Optional[Deadline] = None
+    ) -> tuple[Optional[str], Optional[str]]:
         """
         Publish tweet to Twitter.
         
+        Blocking tweepy calls run in a thread so they never stall the event
+        loop; with a deadline they are abandoned once the Twitter slice is
+        used up.
+        
         Args:
-            text: Tweet text (must be <= 280 characters)
+            text: Tweet text (must be <= 280 weighted characters)
             image_path: Optional path to image
+            deadline: Post deadline; a text-only tweet is posted when the
+                media upload overruns
             
         Returns:
-            Tuple of (success: bool, tweet_url: Optional[str])
-            tweet_url is None if failed or username not available
+            Tuple of (tweet_id: Optional[str], tweet_url: Optional[str])
+            tweet_id is None if failed; tweet_url is None if failed or
+            username not available
         """
         try:
-            # Validate text length
-            if len(text) > 280:
-                logger.warning(f"Tweet text too long ({len(text)} chars), truncating to 280")
-                text = text[:277] + "..."
+            # Validate text length (as Twitter weighs links and emoji)
+            length = twitter_length(text)
+            if length > 280:
+                logger.warning(f"Tweet text too long ({length} weighted chars), truncating to 280")
+                text = truncate_weighted(text)
             
             media_ids = []
             
             # Upload image if provided
             if image_path and image_path.exists():
+                upload_timeout = stage_timeout(deadline, 'twitter')
+                if upload_timeout is not None:
+                    upload_timeout *= MEDIA_UPLOAD_SHARE
                 try:
-                    media = self.api.media_upload(filename=str(image_path))
+                    media = await asyncio.wait_for(
+                        asyncio.to_thread(self.api.media_upload, filename=str(image_path)),
+                        upload_timeout
+                    )
                     media_ids = [media.media_id]
                     logger.debug(f"Image uploaded to Twitter: {media.media_id}")
+                except asyncio.TimeoutError:
+                    deadline.degrade('twitter', "media upload timed out, posted text only")
                 except Exception as e:
                     logger.error(f"Failed to upload image to Twitter: {e}")
             
             # Create tweet
             if media_ids:
-                response = self.client.create_tweet(
-                    text=text,
-                    media_ids=media_ids
-                )
+                create = asyncio.to_thread(self.client.create_tweet, text=text, media_ids=media_ids)
             else:
-                response = self.client.create_tweet(text=text)
+                create = asyncio.to_thread(self.client.create_tweet, text=text)
+            try:
+                response = await asyncio.wait_for(create, stage_timeout(deadline, 'twitter'))
+            except asyncio.TimeoutError:
+                # The request keeps running in its thread and may still succeed
+                deadline.degrade('twitter', "timed out, tweet may not be posted")
+                return None, None
             
-            tweet_id = response.data['id']
+            tweet_id = str(response.data['id'])
             logger.info(f"✅ Published to Twitter: {tweet_id}")
             
-            # Get username to create tweet URL
-            try:
-                me = self.client.get_me()
-                if me.data and me.data.username:
-                    username = me.data.username
-                    tweet_url = f"https://twitter.com/{username}/status/{tweet_id}"
-                    return True, tweet_url
-            except Exception as e:
-                logger.warning(f"Could not get username for tweet URL: {e}")
-                # Return success but without URL
-                return True, None
-            
-            return True, None
+            return tweet_id, await self._tweet_url(tweet_id)
             
         except tweepy.TweepyException as e:
             error_msg = str(e)
@@ -121,7 +165,45 @@ class TwitterPublisher:
                 logger.error("4. Tạo lại Access Token và Access Token Secret sau khi thay đổi quyền")
                 logger.error("5. Cập nhật TWITTER_ACCESS_TOKEN và TWITTER_ACCESS_SECRET trong file .env")
             
-            return False, None
+            return None, None
         except Exception as e:
             logger.error(f"❌ Unexpected error publishing to Twitter: {e}")
-            return False, None
+            return None, None
+    
+    async def delete(self, tweet_id: str) -> bool:
+        """
+        Delete a published tweet.
+        
+        Args:
+            tweet_id: Id returned by publish
+            
+        Returns:
+            True if deleted, False otherwise
+        """
+        try:
+            await asyncio.to_thread(self.client.delete_tweet, tweet_id)
+            logger.info(f"🗑 Deleted tweet: {tweet_id}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to delete tweet {tweet_id}: {e}")
+            return False
+    
+    async def replace(self, tweet_id: str, text: str, image_path: Optional[Path] = None) -> tuple[Optional[str], Optional[str]]:
+        """
+        Replace a tweet with a new version (tweets cannot be edited via the API).
+        
+        The new tweet is posted before the old one is deleted, so a failure
+        never leaves the account without the post.
+        
+        Args:
+            tweet_id: Id of the tweet to replace
+            text: New tweet text
+            image_path: Optional path to image
+            
+        Returns:
+            Tuple of (new tweet_id, tweet_url); tweet_id is None if posting failed
+        """
+        new_id, tweet_url = await self.publish(text, image_path)
+        if new_id:
+            await self.delete(tweet_id)
+        return new_id, tweet_url
@@ -0,0 +1,86 @@
+"""Worker process consuming jobs from the local job queue."""
+
+import asyncio
+import os
+from pathlib import Path
+from config import config
+from utils.logger import setup_logger
+from utils import LoopWatchdog
+from bot.job_queue import JobQueue
+from bot.pipeline import PublishPipeline
+from bot.router import Router
+
+logger = setup_logger(__name__)
+
+
+async def _consume(queue: JobQueue, pipeline: PublishPipeline, worker: int):
+    """Claim and process jobs until the process is stopped."""
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            await asyncio.sleep(config.JOB_POLL_INTERVAL)
+            continue
+
+        job_id, payload, checkpoint = job
+        image_path = payload.get('image_path')
+        try:
+            route = pipeline.router.get(payload['route'])
+            if route is None:
+                raise ValueError(f"Unknown route '{payload['route']}'")
+
+            if payload.get('kind') == 'edit':
+                result = await pipeline.update(
+                    route,
+                    payload['post'],
+                    payload.get('text', ''),
+                    entities=payload.get('entities'),
+                    photo_file_id=payload.get('photo_file_id'),
+                    progress=lambda stage: queue.set_stage(job_id, stage),
+                    checkpoint=checkpoint,
+                    on_checkpoint=lambda state: queue.save_checkpoint(job_id, state)
+                )
+            else:
+                result = await pipeline.run(
+                    route,
+                    payload.get('text', ''),
+                    entities=payload.get('entities'),
+                    image_path=Path(image_path) if image_path else None,
+                    has_image=payload.get('has_image', False),
+                    progress=lambda stage: queue.set_stage(job_id, stage),
+                    checkpoint=checkpoint,
+                    on_checkpoint=lambda state: queue.save_checkpoint(job_id, state)
+                )
+            queue.complete(job_id, result)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            queue.fail(job_id, str(e))
+
+
+async def _run(queue_path: Path):
+    """Run several consumers sharing this process's clients."""
+    worker = os.getpid()
+    queue = JobQueue(queue_path)
+    pipeline = PublishPipeline(Router.from_config())
+    # Kept referenced for the life of the process so its heartbeat task stays alive
+    watchdog = LoopWatchdog(config.LOOP_STALL_THRESHOLD) if config.LOOP_WATCHDOG_ENABLED else None
+    if watchdog:
+        watchdog.start()
+    logger.info(f"👷 Worker {worker} đã sẵn sàng ({config.WORKER_CONCURRENCY} tác vụ song song)")
+
+    await asyncio.gather(*(
+        _consume(queue, pipeline, worker)
+        for _ in range(config.WORKER_CONCURRENCY)
+    ))
+
+
+def run_worker(queue_path: str):
+    """
+    Entry point of a worker process.
+
+    Args:
+        queue_path: Path to the SQLite job queue
+    """
+    try:
+        asyncio.run(_run(Path(queue_path)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,162 @@
+"""Supervise worker processes and relay job results to the intake process."""
+
+import asyncio
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config import config
+from utils.logger import setup_logger
+from bot.job_queue import JobQueue
+from bot.worker import run_worker
+
+logger = setup_logger(__name__)
+
+
+class WorkerPool:
+    """Hand jobs to N worker processes through the SQLite job queue."""
+
+    def __init__(self, num_workers: int, queue_path: Path):
+        """
+        Initialize worker pool.
+
+        Args:
+            num_workers: Number of worker processes
+            queue_path: Path to the SQLite job queue
+        """
+        self.num_workers = num_workers
+        self.queue_path = queue_path
+        self.queue = JobQueue(queue_path, max_attempts=config.JOB_MAX_ATTEMPTS)
+        # spawn: workers must not inherit the intake's event loop or sockets
+        self._context = multiprocessing.get_context('spawn')
+        self._processes: List[Optional[multiprocessing.Process]] = []
+        # Per slot: consecutive quick crashes and earliest restart time
+        self._failures: List[int] = []
+        self._restart_at: List[float] = []
+        self._started_at: List[float] = []
+        self._waiters: Dict[int, Tuple[asyncio.Future, Optional[Callable[[str], None]], Optional[str]]] = {}
+        self._monitor: Optional[asyncio.Task] = None
+
+    def _spawn(self, index: int):
+        """Start the worker process for a slot."""
+        process = self._context.Process(
+            target=run_worker,
+            args=(str(self.queue_path),),
+            daemon=True
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        logger.info(f"👷 Đã khởi động worker {process.pid}")
+
+    async def start(self):
+        """Start workers and the monitor task."""
+        requeued = await asyncio.to_thread(self.queue.requeue_running)
+        purged = await asyncio.to_thread(self.queue.purge_finished)
+        if requeued or purged:
+            logger.info(f"Job queue: {requeued} jobs requeued, {purged} finished jobs purged")
+
+        self._processes = [None] * self.num_workers
+        self._failures = [0] * self.num_workers
+        self._restart_at = [0.0] * self.num_workers
+        self._started_at = [0.0] * self.num_workers
+        for index in range(self.num_workers):
+            self._spawn(index)
+        self._monitor = asyncio.create_task(self._monitor_loop())
+
+    async def stop(self):
+        """Stop the monitor task and terminate workers."""
+        if self._monitor:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+
+        for process in self._processes:
+            if process and process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            if process:
+                process.join(timeout=5)
+
+    async def submit(self, payload: Dict[str, Any], progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Enqueue a job and wait for its result.
+
+        Args:
+            payload: Job description (see bot.worker)
+            progress: Optional callback receiving stage updates
+
+        Returns:
+            Pipeline result dictionary
+
+        Raises:
+            RuntimeError: If the job failed in the worker
+        """
+        # SQLite calls run in a thread so the intake loop never waits on the disk
+        job_id = await asyncio.to_thread(self.queue.put, payload)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[job_id] = (future, progress, None)
+        try:
+            return await future
+        finally:
+            self._waiters.pop(job_id, None)
+
+    async def _monitor_loop(self):
+        """Restart crashed workers and deliver progress and results."""
+        while True:
+            await asyncio.sleep(config.JOB_POLL_INTERVAL)
+            try:
+                await self._check_workers()
+                await self._poll_jobs()
+            except Exception as e:
+                logger.error(f"Worker pool monitor error: {e}", exc_info=True)
+
+    async def _check_workers(self):
+        """Replace dead workers and requeue the jobs they held."""
+        now = time.monotonic()
+        for index, process in enumerate(self._processes):
+            if process is None:
+                if now >= self._restart_at[index]:
+                    self._spawn(index)
+                continue
+            if process.is_alive():
+                continue
+
+            requeued = await asyncio.to_thread(self.queue.requeue_worker, process.pid)
+            logger.warning(
+                f"⚠️ Worker {process.pid} đã dừng (exit code {process.exitcode}), "
+                f"{requeued} tác vụ được đưa lại hàng đợi"
+            )
+            process.join(timeout=0)
+            self._processes[index] = None
+
+            # Back off when a worker keeps crashing right after start
+            if now - self._started_at[index] < 30:
+                self._failures[index] += 1
+            else:
+                self._failures[index] = 0
+            self._restart_at[index] = now + min(60, 2 ** self._failures[index] - 1)
+
+    async def _poll_jobs(self):
+        """Forward stage changes and resolve finished jobs."""
+        if not self._waiters:
+            return
+        jobs = await asyncio.to_thread(self.queue.fetch, list(self._waiters))
+        finished = [job['id'] for job in jobs if job['status'] in ('done', 'failed')]
+        if finished:
+            await asyncio.to_thread(self.queue.delete, finished)
+
+        for job in jobs:
+            waiter = self._waiters.get(job['id'])
+            if waiter is None:
+                continue
+            future, progress, last_stage = waiter
+
+            if job['status'] == 'done':
+                if not future.done():
+                    future.set_result(job['result'])
+            elif job['status'] == 'failed':
+                if not future.done():
+                    future.set_exception(RuntimeError(job['error'] or 'Job failed'))
+            elif progress and job['stage'] and job['stage'] != last_stage:
+                progress(job['stage'])
+                self._waiters[job['id']] = (future, progress, job['stage'])
@@ -25,10 +25,63 @@ class Config:
         self.TWITTER_ACCESS_SECRET = os.getenv('TWITTER_ACCESS_SECRET')
         self.TWITTER_BEARER_TOKEN = os.getenv('TWITTER_BEARER_TOKEN')
         
+        # Multi-account routing table (JSON); overrides the single channel/user/account above
+        self.ROUTES_FILE = os.getenv('ROUTES_FILE')
+        # Posts processed at once across all routes, and per route
+        self.MAX_CONCURRENT_POSTS = int(os.getenv('MAX_CONCURRENT_POSTS', '8'))
+        self.ROUTE_MAX_CONCURRENT = int(os.getenv('ROUTE_MAX_CONCURRENT', '1'))
+        
+        # Minimum seconds between two edits of the status message
+        self.PROGRESS_UPDATE_INTERVAL = float(os.getenv('PROGRESS_UPDATE_INTERVAL', '1.0'))
+        
         # OpenAI settings
         self.OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
         self.OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
         
+        # Fast path: skip OpenAI for posts that need no translation/rewrite
+        self.FAST_PATH_ENABLED = os.getenv('FAST_PATH_ENABLED', 'true').lower() == 'true'
+        self.FAST_PATH_ACTION = os.getenv('FAST_PATH_ACTION', 'skip').lower()  # skip | light
+        self.FAST_PATH_MAX_CHARS = int(os.getenv('FAST_PATH_MAX_CHARS', '280'))
+        self.FAST_PATH_ALLOW_URLS = os.getenv('FAST_PATH_ALLOW_URLS', 'false').lower() == 'true'
+        
+        # Short version: ai = written by the model, local = extracted from the full version
+        self.SHORT_VERSION_MODE = os.getenv('SHORT_VERSION_MODE', 'ai').lower()
+        self.SHORT_VERSION_MAX_HASHTAGS = int(os.getenv('SHORT_VERSION_MAX_HASHTAGS', '2'))
+        
+        # Vision captions for image-only posts
+        self.VISION_THUMBNAIL_SIZE = int(os.getenv('VISION_THUMBNAIL_SIZE', '512'))
+        self.VISION_DETAIL = os.getenv('VISION_DETAIL', 'low')
+        self.VISION_CAPTION_CACHE_SIZE = int(os.getenv('VISION_CAPTION_CACHE_SIZE', '256'))
+        self.VISION_HASH_DISTANCE = int(os.getenv('VISION_HASH_DISTANCE', '4'))
+        
+        # Translation memory: reuse translations of recurring segments
+        self.TRANSLATION_MEMORY_ENABLED = os.getenv('TRANSLATION_MEMORY_ENABLED', 'true').lower() == 'true'
+        self.TRANSLATION_MEMORY_FUZZY_THRESHOLD = float(os.getenv('TRANSLATION_MEMORY_FUZZY_THRESHOLD', '0.92'))
+        
+        # Edited messages: re-translate only changed lines up to this share
+        self.EDIT_SYNC_ENABLED = os.getenv('EDIT_SYNC_ENABLED', 'true').lower() == 'true'
+        self.EDIT_INCREMENTAL_MAX_RATIO = float(os.getenv('EDIT_INCREMENTAL_MAX_RATIO', '0.5'))
+        
+        # Archive of published posts (searchable with /search and /recent)
+        self.ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'true').lower() == 'true'
+        self.ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '50'))
+        self.ARCHIVE_FLUSH_INTERVAL = float(os.getenv('ARCHIVE_FLUSH_INTERVAL', '2.0'))
+        self.ARCHIVE_PAGE_SIZE = int(os.getenv('ARCHIVE_PAGE_SIZE', '5'))
+        
+        # Worst-case seconds per post, split across stages (0 = no limit)
+        self.POST_DEADLINE = float(os.getenv('POST_DEADLINE', '90'))
+        
+        # Event loop watchdog and /debug/profile endpoint (empty token = disabled)
+        self.LOOP_WATCHDOG_ENABLED = os.getenv('LOOP_WATCHDOG_ENABLED', 'true').lower() == 'true'
+        self.LOOP_STALL_THRESHOLD = float(os.getenv('LOOP_STALL_THRESHOLD', '0.5'))
+        self.PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')
+        
+        # Multi-process mode: 0 = process posts in the bot process
+        self.WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', '0'))
+        self.WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', '4'))
+        self.JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '0.5'))
+        self.JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '2'))
+        
         # Logging
         self.LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
         
@@ -36,24 +89,47 @@ class Config:
         self.BASE_DIR = Path(__file__).parent.parent
         self.TEMP_DIR = self.BASE_DIR / 'temp'
         self.TEMP_DIR.mkdir(exist_ok=True)
+        self.TEMP_QUOTA_MB = int(os.getenv('TEMP_QUOTA_MB', '500'))
+        self.TEMP_ORPHAN_MAX_AGE = float(os.getenv('TEMP_ORPHAN_MAX_AGE', '3600'))
+        self.DATA_DIR = Path(os.getenv('DATA_DIR', self.BASE_DIR / 'data'))
+        self.DATA_DIR.mkdir(parents=True, exist_ok=True)
+        self.TRANSLATION_MEMORY_PATH = self.DATA_DIR / 'translation_memory.db'
+        self.JOB_QUEUE_PATH = self.DATA_DIR / 'jobs.db'
+        self.POST_STORE_PATH = self.DATA_DIR / 'posts.db'
+        self.ARCHIVE_PATH = self.DATA_DIR / 'archive.db'
         
         # Validate required settings
         self._validate()
     
+    def twitter_credentials(self) -> dict:
+        """Return the default Twitter account credentials."""
+        return {
+            'api_key': self.TWITTER_API_KEY,
+            'api_secret': self.TWITTER_API_SECRET,
+            'access_token': self.TWITTER_ACCESS_TOKEN,
+            'access_secret': self.TWITTER_ACCESS_SECRET,
+            'bearer_token': self.TWITTER_BEARER_TOKEN,
+        }
+    
     def _validate(self):
         """Validate that all required settings are present."""
         required_settings = {
             'TELEGRAM_BOT_TOKEN': self.TELEGRAM_BOT_TOKEN,
-            'TELEGRAM_CHANNEL_ID': self.TELEGRAM_CHANNEL_ID,
-            'AUTHORIZED_USER_ID': self.AUTHORIZED_USER_ID,
-            'TWITTER_API_KEY': self.TWITTER_API_KEY,
-            'TWITTER_API_SECRET': self.TWITTER_API_SECRET,
-            'TWITTER_ACCESS_TOKEN': self.TWITTER_ACCESS_TOKEN,
-            'TWITTER_ACCESS_SECRET': self.TWITTER_ACCESS_SECRET,
-            'TWITTER_BEARER_TOKEN': self.TWITTER_BEARER_TOKEN,
             'OPENAI_API_KEY': self.OPENAI_API_KEY,
         }
         
+        # With a routing table, channels, users and accounts come from the file
+        if not self.ROUTES_FILE:
+            required_settings.update({
+                'TELEGRAM_CHANNEL_ID': self.TELEGRAM_CHANNEL_ID,
+                'AUTHORIZED_USER_ID': self.AUTHORIZED_USER_ID,
+                'TWITTER_API_KEY': self.TWITTER_API_KEY,
+                'TWITTER_API_SECRET': self.TWITTER_API_SECRET,
+                'TWITTER_ACCESS_TOKEN': self.TWITTER_ACCESS_TOKEN,
+                'TWITTER_ACCESS_SECRET': self.TWITTER_ACCESS_SECRET,
+                'TWITTER_BEARER_TOKEN': self.TWITTER_BEARER_TOKEN,
+            })
+        
         missing = [key for key, value in required_settings.items() if not value]
         
         if missing:
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Bulk import of a Telegram channel history export.
+
+Streams the result.json written by Telegram Desktop (Export chat history,
+format JSON) and publishes every post through the normal AI and publishing
+pipeline. Progress is checkpointed so an interrupted import resumes where
+it stopped.
+
+Usage:
+    python import_history.py path/to/result.json --route default
+    python import_history.py path/to/result.json --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from config import config
+from utils.logger import setup_logger
+from utils.language_detector import detect_language
+
+logger = setup_logger(__name__)
+
+# Export entity types -> Bot API entity types protected by the preprocessor
+EXPORT_ENTITY_TYPES = {
+    'link': 'url',
+    'email': 'email',
+    'mention': 'mention',
+    'hashtag': 'hashtag',
+    'cashtag': 'cashtag',
+}
+
+# Rough size of the prompt template around the post text, in tokens
+PROMPT_OVERHEAD_TOKENS = 250
+
+
+def iter_export_messages(path: Path, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the messages of an export one at a time.
+
+    The file is read in chunks and each message object is decoded with
+    json.JSONDecoder.raw_decode as soon as it is complete, so memory use
+    depends on the largest message, not on the size of the export.
+
+    Args:
+        path: Path to result.json
+        chunk_size: Characters read per chunk
+
+    Returns:
+        Iterator over message dictionaries
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        # Skip the header up to the start of the "messages" array
+        buffer = ''
+        while True:
+            key = buffer.find('"messages"')
+            start = buffer.find('[', key) if key != -1 else -1
+            if start != -1:
+                buffer = buffer[start + 1:]
+                break
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise ValueError(f"{path} has no \"messages\" array")
+            buffer += chunk
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+
+            try:
+                if pos >= len(buffer):
+                    raise json.JSONDecodeError('need more data', buffer, pos)
+                message, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The next message is not complete yet: read more
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise ValueError(f"{path} ends in the middle of a message")
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+
+            yield message
+
+            # Drop consumed text so the buffer never grows with the file
+            if pos >= chunk_size:
+                buffer = buffer[pos:]
+                pos = 0
+
+
+def export_text(message: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Rebuild text and Bot API style entities from an exported message.
+
+    Args:
+        message: Exported message
+
+    Returns:
+        Tuple of (text, entity dicts with UTF-16 offsets)
+    """
+    parts = message.get('text_entities')
+    if parts is None:
+        text = message.get('text', '')
+        parts = text if isinstance(text, list) else [text]
+
+    text_parts: List[str] = []
+    entities: List[Dict[str, Any]] = []
+    offset = 0
+    for part in parts:
+        if isinstance(part, str):
+            part = {'type': 'plain', 'text': part}
+        value = part.get('text', '')
+        length = len(value.encode('utf-16-le')) // 2
+        entity_type = EXPORT_ENTITY_TYPES.get(part.get('type'))
+        if entity_type and length:
+            entities.append({'type': entity_type, 'offset': offset, 'length': length})
+        text_parts.append(value)
+        offset += length
+
+    return ''.join(text_parts), entities
+
+
+class Checkpoint:
+    """Id of the last message below which everything has been handled."""
+
+    def __init__(self, path: Path):
+        """
+        Initialize checkpoint, loading saved progress if present.
+
+        Args:
+            path: JSON checkpoint file
+        """
+        self.path = path
+        self.last_id = 0
+        self.published = 0
+        self.failed_ids: List[int] = []
+        self._started: Deque[int] = deque()
+        self._done: Set[int] = set()
+
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.last_id = data.get('last_id', 0)
+            self.published = data.get('published', 0)
+            self.failed_ids = data.get('failed_ids', [])
+
+    def start(self, message_id: int):
+        """Mark a message as in flight (messages start in export order)."""
+        self._started.append(message_id)
+
+    def finish(self, message_id: int, success: bool):
+        """
+        Mark a message as handled and save progress.
+
+        Posts finish out of order, so the checkpoint only moves past a
+        message once every earlier message has finished too.
+
+        Args:
+            message_id: Exported message id
+            success: Whether it was published anywhere
+        """
+        self._done.add(message_id)
+        if success:
+            self.published += 1
+            if message_id in self.failed_ids:
+                # Published by --retry-failed
+                self.failed_ids.remove(message_id)
+        elif message_id not in self.failed_ids:
+            self.failed_ids.append(message_id)
+
+        while self._started and self._started[0] in self._done:
+            finished = self._started.popleft()
+            self._done.discard(finished)
+            # Retried messages lie below the checkpoint and never move it back
+            self.last_id = max(self.last_id, finished)
+        self.save()
+
+    def save(self):
+        """Write the checkpoint atomically."""
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'last_id': self.last_id, 'published': self.published, 'failed_ids': self.failed_ids},
+                f
+            )
+        os.replace(tmp_path, self.path)
+
+
+def pending_posts(
+    export_path: Path,
+    last_id: int,
+    limit: Optional[int],
+    retry_ids: Optional[Set[int]] = None
+) -> Iterator[Tuple[int, str, List[Dict[str, Any]], Optional[Path]]]:
+    """
+    Yield (id, text, entities, photo path) of publishable messages after last_id.
+
+    Args:
+        export_path: Path to result.json
+        last_id: Checkpointed message id
+        limit: Maximum posts to yield
+        retry_ids: Earlier messages to yield again (failed posts)
+
+    Returns:
+        Iterator over posts in export order
+    """
+    retry_ids = retry_ids or set()
+    count = 0
+    for message in iter_export_messages(export_path):
+        message_id = message.get('id', 0)
+        if message.get('type') != 'message' or (message_id <= last_id and message_id not in retry_ids):
+            continue
+
+        text, entities = export_text(message)
+        photo = message.get('photo')
+        image_path = export_path.parent / photo if photo and not photo.startswith('(') else None
+        if not text.strip() and image_path is None:
+            # Stickers, polls, videos without captions...
+            continue
+
+        yield message['id'], text, entities, image_path
+        count += 1
+        if limit and count >= limit:
+            return
+
+
+def dry_run(export_path: Path, last_id: int, limit: Optional[int], retry_ids: Optional[Set[int]] = None):
+    """Count posts, API calls and estimated tokens without calling any API."""
+    from bot.ai_processor import AIProcessor
+
+    ai_processor = AIProcessor()
+    # One fast-path log line per post would drown the summary
+    logging.getLogger('bot.ai_processor').setLevel(logging.WARNING)
+    totals = {'posts': 0, 'photos': 0, 'openai_calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+    for _, text, entities, image_path in pending_posts(export_path, last_id, limit, retry_ids):
+        totals['posts'] += 1
+        if image_path:
+            totals['photos'] += 1
+
+        doc = ai_processor.preprocessor.process(text, entities)
+        cleaned = doc.restore(doc.text)
+        if not cleaned:
+            # Image-only post: one vision call with a low-detail thumbnail
+            totals['openai_calls'] += 1
+            totals['prompt_tokens'] += PROMPT_OVERHEAD_TOKENS + 85
+            totals['completion_tokens'] += 150
+            continue
+
+        decision = ai_processor._classify_fast_path(cleaned, detect_language(cleaned))
+        if decision == 'skip':
+            continue
+        text_tokens = max(1, len(doc.text) // 4)
+        totals['openai_calls'] += 1
+        if decision == 'light':
+            totals['prompt_tokens'] += text_tokens + 30
+            totals['completion_tokens'] += 15
+        else:
+            totals['prompt_tokens'] += text_tokens + PROMPT_OVERHEAD_TOKENS
+            totals['completion_tokens'] += text_tokens * 2 + 80
+
+    posts = totals['posts']
+    logger.info("🧪 Chạy thử (không gọi API)")
+    logger.info(f"📨 Bài sẽ đăng: {posts} ({totals['photos']} có hình ảnh)")
+    logger.info(f"🤖 OpenAI: {totals['openai_calls']} lần gọi, ~{totals['prompt_tokens']} token vào, ~{totals['completion_tokens']} token ra")
+    logger.info(f"📤 Telegram: {posts} lần gọi")
+    logger.info(f"🐦 Twitter: {posts} tweet, {totals['photos']} lần tải ảnh")
+    if posts and config.TRANSLATION_MEMORY_ENABLED:
+        logger.info("💡 Translation memory có thể giảm số token thực tế với nội dung lặp lại")
+
+
+async def run_import(export_path: Path, route_name: Optional[str], checkpoint: Checkpoint,
+                     concurrency: int, delay: float, limit: Optional[int], retry_failed: bool = False):
+    """
+    Process pending posts concurrently and publish them in export order.
+
+    The AI stage runs for up to `concurrency` posts at once; publishing
+    is sequential, so the channel and Twitter get the history in its
+    original order.
+
+    Args:
+        export_path: Path to result.json
+        route_name: Route to publish to (None = match by the exported chat id)
+        checkpoint: Progress of earlier runs
+        concurrency: Posts processed by the AI at once
+        delay: Minimum seconds between two published posts
+        limit: Maximum posts to publish in this run
+        retry_failed: Publish the posts that failed in earlier runs again
+    """
+    from bot.archive import PostArchive
+    from bot.pipeline import PublishPipeline
+    from bot.router import Router
+
+    router = Router.from_config()
+    source_chat_id = _export_chat_id(export_path)
+    route = router.get(route_name) if route_name else None
+    if route is None and not route_name and source_chat_id is not None:
+        route = next((r for r in router.routes if source_chat_id in r.source_chats), None)
+    if route is None:
+        names = ', '.join(r.name for r in router.routes)
+        raise SystemExit(f"❌ Không xác định được tuyến đăng bài, dùng --route ({names})")
+
+    pipeline = PublishPipeline(router)
+    archive = PostArchive(config.ARCHIVE_PATH) if config.ARCHIVE_ENABLED else None
+    # Posts wait here in export order with their AI task; the bound keeps
+    # memory constant however long the export is
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    ai_slots = asyncio.Semaphore(concurrency)
+    retry_ids = set(checkpoint.failed_ids) if retry_failed else None
+
+    logger.info(f"📥 Nhập lịch sử vào tuyến {route.name} (tiếp tục sau tin nhắn #{checkpoint.last_id})")
+    if retry_ids:
+        logger.info(f"🔁 Thử lại {len(retry_ids)} bài lỗi trước đó")
+
+    async def _process(text: str, entities: List[Dict[str, Any]], image_path: Optional[Path]) -> Dict[str, Any]:
+        async with ai_slots:
+            return await pipeline.ai_processor.process_message(
+                text,
+                has_image=image_path is not None,
+                entities=entities,
+                image_path=image_path if image_path and image_path.exists() else None,
+                style=route.prompt_style
+            )
+
+    async def _publish():
+        next_start = time.monotonic()
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            (message_id, text, entities, image_path), ai_task = item
+
+            success = False
+            try:
+                processed = await ai_task
+                wait = next_start - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                next_start = time.monotonic() + delay
+
+                # The AI result is passed as a finished step, so only publishing runs
+                result = await pipeline.run(
+                    route,
+                    text,
+                    entities=entities,
+                    image_path=image_path if image_path and image_path.exists() else None,
+                    has_image=image_path is not None,
+                    checkpoint={'ai': {
+                        key: processed.get(key) for key in ('full_text', 'short_text', 'segments', 'usage')
+                    }}
+                )
+                success = result['telegram_success'] or result['twitter_success']
+                if success and archive:
+                    archive.record(dict(
+                        result,
+                        route=route.name,
+                        chat_id=source_chat_id,
+                        message_id=message_id,
+                        original_text=text
+                    ))
+                logger.info(f"{'✅' if success else '❌'} Tin nhắn #{message_id}")
+            except Exception as e:
+                logger.error(f"❌ Tin nhắn #{message_id} lỗi: {e}", exc_info=True)
+            checkpoint.finish(message_id, success)
+
+    publisher = asyncio.create_task(_publish())
+    ai_tasks: List[asyncio.Task] = []
+    try:
+        for post in pending_posts(export_path, checkpoint.last_id, limit, retry_ids):
+            checkpoint.start(post[0])
+            _, text, entities, image_path = post
+            ai_task = asyncio.create_task(_process(text, entities, image_path))
+            ai_tasks.append(ai_task)
+            await queue.put((post, ai_task))
+            ai_tasks = [task for task in ai_tasks if not task.done()]
+            # Parsing is synchronous, give the other tasks a turn between messages
+            await asyncio.sleep(0)
+        await queue.put(None)
+        await publisher
+    finally:
+        publisher.cancel()
+        for task in ai_tasks:
+            task.cancel()
+        if archive:
+            archive.close()
+
+    logger.info(f"🏁 Hoàn tất: {checkpoint.published} bài đã đăng, {len(checkpoint.failed_ids)} lỗi")
+
+
+def _export_chat_id(export_path: Path) -> Optional[int]:
+    """Bot API chat id of the exported channel, read from the file header."""
+    with open(export_path, 'r', encoding='utf-8') as f:
+        header = f.read(4096)
+    key = header.find('"id"')
+    if key == -1:
+        return None
+    digits = ''.join(ch for ch in header[header.find(':', key) + 1:].lstrip()[:20] if ch.isdigit())
+    # Channel ids in the Bot API are prefixed with -100
+    return int(f"-100{digits}") if digits else None
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Nhập lịch sử kênh Telegram (JSON export) và đăng lại")
+    parser.add_argument('export', type=Path, help="Đường dẫn tới result.json")
+    parser.add_argument('--route', help="Tên tuyến đăng bài (mặc định: theo id kênh trong file)")
+    parser.add_argument('--concurrency', type=int, default=2, help="Số bài xử lý AI song song (vẫn đăng theo thứ tự)")
+    parser.add_argument('--delay', type=float, default=5.0, help="Số giây tối thiểu giữa hai bài")
+    parser.add_argument('--limit', type=int, help="Chỉ đăng tối đa N bài trong lần chạy này")
+    parser.add_argument('--checkpoint', type=Path, help="File lưu tiến độ (mặc định: data/import_<tên file>.json)")
+    parser.add_argument('--retry-failed', action='store_true', help="Đăng lại các bài lỗi ở lần chạy trước")
+    parser.add_argument('--dry-run', action='store_true', help="Chỉ ước tính token và số lần gọi API")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or config.DATA_DIR / f"import_{args.export.parent.name or 'export'}.json"
+    checkpoint = Checkpoint(checkpoint_path)
+
+    try:
+        retry_ids = set(checkpoint.failed_ids) if args.retry_failed else None
+        if args.dry_run:
+            dry_run(args.export, checkpoint.last_id, args.limit, retry_ids)
+        else:
+            asyncio.run(run_import(
+                args.export, args.route, checkpoint, max(1, args.concurrency),
+                args.delay, args.limit, retry_failed=args.retry_failed
+            ))
+    except KeyboardInterrupt:
+        logger.info(f"\n⏸ Đã dừng, chạy lại để tiếp tục sau tin nhắn #{checkpoint.last_id}")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,27 @@
 
 from .image_handler import ImageHandler
 from .logger import setup_logger
+from .language_detector import detect_language, contains_url
+from .text_preprocessor import TextPreprocessor, PreprocessedText
+from .temp_storage import TempStorage, TempScope, temp_storage
+from .deadline import Deadline
+from .loop_watchdog import LoopWatchdog, sample_stacks
+from .summarizer import build_short_version, twitter_length, truncate_weighted
 
-__all__ = ['ImageHandler', 'setup_logger']
+__all__ = [
+    'ImageHandler',
+    'setup_logger',
+    'detect_language',
+    'contains_url',
+    'TextPreprocessor',
+    'PreprocessedText',
+    'TempStorage',
+    'TempScope',
+    'temp_storage',
+    'Deadline',
+    'LoopWatchdog',
+    'sample_stacks',
+    'build_short_version',
+    'twitter_length',
+    'truncate_weighted',
+]
@@ -0,0 +1,75 @@
+"""Per-post deadline budget split across pipeline stages."""
+
+import time
+from typing import Dict, List, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Share of the total budget reserved for each stage, in pipeline order
+STAGE_SHARES: Dict[str, float] = {
+    'image': 0.1,
+    'ai': 0.5,
+    'telegram': 0.15,
+    'twitter': 0.25,
+}
+
+# Part of a publish stage that a media upload may use before the post
+# goes out without it
+MEDIA_UPLOAD_SHARE = 0.7
+
+
+class Deadline:
+    """Time budget of one post; stages degrade instead of overrunning it."""
+
+    def __init__(self, seconds: float, shares: Optional[Dict[str, float]] = None):
+        """
+        Initialize deadline.
+
+        Args:
+            seconds: Total budget for the post
+            shares: Stage name -> share of the budget, in pipeline order
+        """
+        self.seconds = seconds
+        self.shares = shares or STAGE_SHARES
+        self.expires_at = time.monotonic() + seconds
+        self.degradations: List[str] = []
+
+    def remaining(self) -> float:
+        """Seconds left until the deadline."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def budget(self, stage: str) -> float:
+        """
+        Seconds a stage may use right now.
+
+        Time left over by earlier stages flows to later ones, while the
+        slices of the stages still to come stay reserved.
+
+        Args:
+            stage: Stage name from the shares table
+
+        Returns:
+            Available seconds (0 when the stage has no time left)
+        """
+        stages = list(self.shares)
+        later = stages[stages.index(stage) + 1:]
+        reserved = self.seconds * sum(self.shares[name] for name in later)
+        return max(self.remaining() - reserved, 0.0)
+
+    def degrade(self, stage: str, reason: str):
+        """
+        Record that a stage fell back to a cheaper result.
+
+        Args:
+            stage: Stage name
+            reason: What was skipped or replaced
+        """
+        entry = f"{stage}: {reason}"
+        self.degradations.append(entry)
+        logger.warning(f"⏱ Deadline degradation - {entry}")
+
+
+def stage_timeout(deadline: Optional[Deadline], stage: str) -> Optional[float]:
+    """Timeout for asyncio.wait_for; None (no limit) without a deadline."""
+    return deadline.budget(stage) if deadline else None
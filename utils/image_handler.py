@@ -1,11 +1,15 @@
 """Image handling utilities."""
 
+import asyncio
+import io
 import os
 from pathlib import Path
 from typing import Optional
 from PIL import Image
 from config import config
 from utils.logger import setup_logger
+from utils.deadline import Deadline, stage_timeout
+from utils.temp_storage import TempScope, temp_storage
 
 logger = setup_logger(__name__)
 
@@ -16,24 +20,28 @@ class ImageHandler:
     def __init__(self):
         """Initialize image handler."""
         self.temp_dir = config.TEMP_DIR
+        self.storage = temp_storage
         
-    async def download_image(self, file, file_id: str) -> Optional[Path]:
+    async def download_image(self, file, file_id: str, scope: Optional[TempScope] = None) -> Optional[Path]:
         """
         Download image from Telegram.
         
         Args:
             file: Telegram file object
             file_id: Unique file identifier
+            scope: Temp scope that owns (and later removes) the file
             
         Returns:
             Path to downloaded file or None if failed
         """
         try:
             # Get file path
-            file_path = self.temp_dir / f"{file_id}.jpg"
+            name = f"{file_id}.jpg"
+            file_path = scope.path(name) if scope else self.temp_dir / name
             
             # Download file
             await file.download_to_drive(file_path)
+            self.storage.enforce_quota()
             
             logger.info(f"Image downloaded: {file_path}")
             return file_path
@@ -42,13 +50,19 @@ class ImageHandler:
             logger.error(f"Failed to download image: {e}")
             return None
     
-    def optimize_image(self, image_path: Path, max_size: int = 5 * 1024 * 1024) -> Path:
+    def optimize_image(
+        self,
+        image_path: Path,
+        max_size: int = 5 * 1024 * 1024,
+        scope: Optional[TempScope] = None
+    ) -> Path:
         """
         Optimize image for social media.
         
         Args:
             image_path: Path to image
             max_size: Maximum file size in bytes (default 5MB for Twitter)
+            scope: Temp scope that owns the optimized copy
             
         Returns:
             Path to optimized image
@@ -72,7 +86,9 @@ class ImageHandler:
                     img = img.resize(new_size, Image.Resampling.LANCZOS)
                 
                 # Save with optimization
-                optimized_path = image_path.with_stem(f"{image_path.stem}_optimized")
+                optimized_path = self._optimized_path(image_path)
+                if scope:
+                    scope.adopt(optimized_path)
                 quality = 85
                 
                 while quality > 20:
@@ -90,17 +106,99 @@ class ImageHandler:
             logger.error(f"Failed to optimize image: {e}")
             return image_path
     
-    def cleanup(self, *file_paths: Path):
+    @staticmethod
+    def _optimized_path(image_path: Path) -> Path:
+        """Path of the optimized copy of an image."""
+        return image_path.with_stem(f"{image_path.stem}_optimized")
+    
+    async def optimize(
+        self,
+        image_path: Path,
+        scope: Optional[TempScope] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Path:
+        """
+        Optimize an image off the event loop within the deadline's image slice.
+        
+        Args:
+            image_path: Path to image
+            scope: Temp scope that owns the optimized copy
+            deadline: Post deadline; the original is used when its slice runs out
+            
+        Returns:
+            Path to optimized image, or the original on timeout
+        """
+        # The scope adopts the copy before it is written, even if it is not used
+        work = asyncio.ensure_future(asyncio.to_thread(self.optimize_image, image_path, scope=scope))
+        try:
+            return await asyncio.wait_for(asyncio.shield(work), stage_timeout(deadline, 'image'))
+        except asyncio.TimeoutError:
+            # The scope may be released before the thread finishes writing
+            # the copy; remove it then unless it is still owned
+            optimized_path = self._optimized_path(image_path)
+            work.add_done_callback(lambda _: self.storage.discard(optimized_path))
+            deadline.degrade('image', "optimization timed out, sending original")
+            return image_path
+    
+    async def create_thumbnail(self, image_path: Path, max_side: int = 512) -> Optional[tuple[bytes, int]]:
+        """
+        Create a compact JPEG thumbnail and perceptual hash off the event loop.
+        
+        Args:
+            image_path: Path to image
+            max_side: Longest side of the thumbnail in pixels
+            
+        Returns:
+            Tuple of (JPEG bytes, 64-bit difference hash) or None if failed
         """
-        Remove temporary files.
+        try:
+            return await asyncio.to_thread(self._make_thumbnail, image_path, max_side)
+        except Exception as e:
+            logger.error(f"Failed to create thumbnail: {e}")
+            return None
+    
+    @staticmethod
+    def _make_thumbnail(image_path: Path, max_side: int) -> tuple[bytes, int]:
+        """Build thumbnail bytes and dHash for an image (blocking)."""
+        with Image.open(image_path) as img:
+            img = img.convert('RGB')
+            image_hash = ImageHandler._difference_hash(img)
+            
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            img.save(buffer, 'JPEG', quality=70, optimize=True)
+            
+        return buffer.getvalue(), image_hash
+    
+    async def compute_hash(self, image_path: Path) -> Optional[str]:
+        """
+        Compute the perceptual hash of an image off the event loop.
         
         Args:
-            *file_paths: Paths to files to remove
+            image_path: Path to image
+            
+        Returns:
+            64-bit difference hash as 16 hex digits, or None if failed
         """
-        for file_path in file_paths:
-            try:
-                if file_path and file_path.exists():
-                    file_path.unlink()
-                    logger.debug(f"Cleaned up: {file_path}")
-            except Exception as e:
-                logger.error(f"Failed to cleanup {file_path}: {e}")
+        def _hash() -> str:
+            with Image.open(image_path) as img:
+                return f"{ImageHandler._difference_hash(img):016x}"
+        
+        try:
+            return await asyncio.to_thread(_hash)
+        except Exception as e:
+            logger.error(f"Failed to hash image: {e}")
+            return None
+    
+    @staticmethod
+    def _difference_hash(img: Image.Image) -> int:
+        """Difference hash: compare neighbouring pixels of a 9x8 grayscale."""
+        gray = img.convert('L').resize((9, 8), Image.Resampling.LANCZOS)
+        pixels = list(gray.getdata())
+        image_hash = 0
+        for row in range(8):
+            for col in range(8):
+                left = pixels[row * 9 + col]
+                right = pixels[row * 9 + col + 1]
+                image_hash = (image_hash << 1) | (left > right)
+        return image_hash
@@ -0,0 +1,76 @@
+"""Lightweight on-CPU language detection."""
+
+import re
+import unicodedata
+
+# Letters that only appear in Vietnamese among Latin-script languages:
+# the breve/horn/stroke letters plus the tone-marked letters of the
+# Latin Extended Additional block (á, ê, ô... are shared with French,
+# Spanish and Portuguese and prove nothing on their own)
+VIETNAMESE_CHARS = set('ăđơư') | {
+    chr(code) for code in range(0x1EA0, 0x1EFA)
+}
+
+# Frequent Vietnamese words written without diacritics (telex-less typing)
+VIETNAMESE_WORDS = {
+    'khong', 'nhung', 'duoc', 'cua', 'cho', 'voi', 'nguoi', 'trong',
+    'nhu', 'mot', 'nay', 'cac', 'nhieu', 'dang', 'thi', 'ban', 'minh',
+    'chung', 'toi', 'den', 'lam', 'rat', 'cung', 'roi', 'vay', 'nhe',
+}
+
+# Frequent English words
+ENGLISH_WORDS = {
+    'the', 'and', 'is', 'are', 'to', 'of', 'in', 'for', 'on', 'with',
+    'this', 'that', 'it', 'you', 'we', 'our', 'your', 'be', 'at', 'by',
+    'from', 'as', 'was', 'will', 'have', 'has', 'not', 'or', 'an', 'new',
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+_URL_RE = re.compile(r'(?:https?://|www\.|t\.me/)\S+', re.IGNORECASE)
+
+
+def contains_url(text: str) -> bool:
+    """Return True if text contains at least one URL."""
+    return bool(_URL_RE.search(text or ''))
+
+
+def detect_language(text: str) -> str:
+    """
+    Detect whether text is Vietnamese or English.
+
+    Uses Vietnamese-specific diacritics first, then falls back to
+    stop-word hits for text typed without accents.
+
+    Args:
+        text: Text to inspect
+
+    Returns:
+        'vi', 'en' or 'unknown'
+    """
+    if not text:
+        return 'unknown'
+
+    # Decomposed input (base letter + combining mark) would split words apart
+    text = unicodedata.normalize('NFC', text)
+    text = _URL_RE.sub(' ', text).lower()
+    letters = [c for c in text if c.isalpha()]
+    if not letters:
+        return 'unknown'
+
+    vietnamese_letters = sum(1 for c in letters if c in VIETNAMESE_CHARS)
+    if vietnamese_letters / len(letters) >= 0.02:
+        return 'vi'
+
+    # Any non-Latin script means we cannot vouch for English
+    if any('LATIN' not in unicodedata.name(c, '') for c in letters):
+        return 'unknown'
+
+    words = _WORD_RE.findall(text)
+    vi_hits = sum(1 for w in words if w in VIETNAMESE_WORDS)
+    en_hits = sum(1 for w in words if w in ENGLISH_WORDS)
+
+    if vi_hits > en_hits:
+        return 'vi'
+    if en_hits and en_hits >= vi_hits:
+        return 'en'
+    return 'unknown'
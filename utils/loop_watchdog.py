@@ -0,0 +1,133 @@
+"""Event loop stall detection and sampling profiler."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class LoopWatchdog:
+    """Measure event loop lag and log the loop thread's stack when it stalls."""
+
+    def __init__(self, threshold: float = 0.5, interval: float = 0.1):
+        """
+        Initialize watchdog.
+
+        Args:
+            threshold: Seconds a callback may block the loop before it is reported
+            interval: Seconds between heartbeats (and watchdog checks)
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.loop_thread_id: Optional[int] = None
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_stall: Optional[Dict[str, Any]] = None
+        self._last_beat = time.monotonic()
+        self._reported = False
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start watching the running loop (call from the loop's thread)."""
+        self.loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._thread.start()
+        logger.info(f"🐕 Loop watchdog started (threshold {self.threshold}s)")
+
+    def stop(self):
+        """Stop the heartbeat and the watchdog thread."""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        """Wake up every interval; oversleeping is the loop's lag (stalls are logged by _watch)."""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            self.max_lag = max(self.max_lag, now - expected)
+
+    def _watch(self):
+        """Capture the loop thread's stack while a heartbeat is overdue."""
+        while not self._stop.wait(self.interval):
+            overdue = time.monotonic() - self._last_beat - self.interval
+            if overdue <= self.threshold:
+                self._reported = False
+                continue
+            if self._reported:
+                continue
+
+            # Report each stall once, while the blocking code is still on the stack
+            self._reported = True
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame else '<no frame>'
+            self.stalls += 1
+            self.last_stall = {'at': time.time(), 'blocked_for': round(overdue, 3), 'stack': stack}
+            logger.warning(f"⚠️ Event loop blocked for {overdue:.2f}s, loop thread stack:\n{stack}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag counters for metrics (the stall stack is left out, see last_stall)."""
+        return {
+            'stalls': self.stalls,
+            'max_lag': round(self.max_lag, 3),
+            'threshold': self.threshold,
+            'last_stall_at': self.last_stall['at'] if self.last_stall else None,
+            'last_stall_blocked_for': self.last_stall['blocked_for'] if self.last_stall else None,
+        }
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, thread_ids: Optional[Iterable[int]] = None) -> str:
+    """
+    Sample thread stacks and return them in collapsed (folded) format.
+
+    Each line is "thread;outer;...;inner count", which flamegraph.pl,
+    speedscope and similar tools read directly. Nothing runs between
+    calls, so there is no cost while idle.
+
+    Args:
+        seconds: How long to sample
+        interval: Seconds between samples
+        thread_ids: Only sample these threads (default: all but the caller)
+
+    Returns:
+        Collapsed stacks, most frequent first
+    """
+    own = threading.get_ident()
+    wanted = set(thread_ids) if thread_ids is not None else None
+    counts: Counter = Counter()
+    end = time.monotonic() + seconds
+
+    while time.monotonic() < end:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or (wanted is not None and thread_id not in wanted):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            counts[';'.join(reversed(stack))] += 1
+        time.sleep(interval)
+
+    return '\n'.join(f"{stack} {count}" for stack, count in counts.most_common())
@@ -0,0 +1,280 @@
+"""Local extractive short versions that fit Twitter's weighted length."""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List
+
+TWEET_LIMIT = 280
+# Every link is shortened to a t.co URL of this weight
+TCO_URL_LENGTH = 23
+# Longer words make poor hashtags
+MAX_HASHTAG_WORD = 20
+# Code points counted once; everything else (CJK, emoji...) counts twice
+_WEIGHT_ONE_RANGES = ((0, 4351), (8192, 8205), (8208, 8223), (8242, 8247))
+
+# Top-level domains Twitter links without a scheme (t.me/chan, example.com)
+_BARE_TLDS = (
+    'com|net|org|edu|gov|info|biz|io|me|co|app|dev|ai|xyz|ly|gl|gg|tv|fm|to|so|link|site|online|'
+    'store|shop|page|vn|uk|us|de|fr|jp|kr|cn|sg|au|ca|in|ru|be|nl|it|es'
+)
+_URL_RE = re.compile(
+    r'(?:https?://|www\.)\S+'
+    r'|(?<![\w@.-])(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+(?:' + _BARE_TLDS + r')\b(?:/\S*)?',
+    re.IGNORECASE
+)
+_HASHTAG_RE = re.compile(r'(?<!\w)#\w+')
+_SENTENCE_RE = re.compile(r'(?<=[.!?…])\s+|\s*\n+\s*')
+_WORD_RE = re.compile(r'[^\W\d_]{2,}')
+
+_STOPWORDS = frozenset("""
+a about above after again against all also always am an and another any anyone anything are around as at
+away back be because been before being below best between both but by can cannot could day days did do
+does doing done down during each either else enough even ever every everyone everything few first for from
+further get gets getting go goes going good got great had has have having he her here hers him his how i
+if in into is it its itself just last less let like made make makes many may me might more most much must
+my never new next no nor not nothing now of off often on once one only onto or other others our ours out
+over own per really right same see she should since so some something soon still such sure take than that
+the their theirs them then there these they thing things this those though through thus time times to
+today together too under until up upon us use used very want was way we well were what when where which
+while who whom whose why will with within without would yes yet you your yours
+please thank thanks support follow read share excited announce post check visit join click link
+và của là các những được cho với trong này có không một người đã sẽ để khi từ theo như thì
+rất cũng nhiều đến làm rồi vậy nhé bạn mình chúng tôi ta đó nào gì hơn ra vào lên xuống đang vẫn chỉ
+nên nếu vì bởi mà hay hoặc cùng tại về sau trước năm ngày hôm nay còn lại nữa thêm
+""".split())
+
+
+def _char_weight(char: str) -> int:
+    code = ord(char)
+    for low, high in _WEIGHT_ONE_RANGES:
+        if low <= code <= high:
+            return 1
+    return 2
+
+
+def twitter_length(text: str) -> int:
+    """
+    Length of a tweet as Twitter counts it.
+
+    URLs (with or without a scheme) count as 23 characters; code points outside the Latin and
+    general-punctuation ranges (CJK, emoji) count as 2. Emoji sequences
+    are counted per code point, which can only overestimate.
+
+    Args:
+        text: Tweet text
+
+    Returns:
+        Weighted length (a tweet may have at most 280)
+    """
+    text = unicodedata.normalize('NFC', text)
+    length = 0
+    position = 0
+    for match in _URL_RE.finditer(text):
+        length += sum(_char_weight(c) for c in text[position:match.start()]) + TCO_URL_LENGTH
+        position = match.end()
+    return length + sum(_char_weight(c) for c in text[position:])
+
+
+def truncate_weighted(text: str, limit: int = TWEET_LIMIT, ellipsis: str = '…') -> str:
+    """
+    Shorten text to a weighted length at a word boundary.
+
+    Args:
+        text: Text to shorten
+        limit: Maximum weighted length including the ellipsis
+        ellipsis: Appended when text is cut
+
+    Returns:
+        Text that fits the limit (links are never cut in half)
+    """
+    text = text.strip()
+    if twitter_length(text) <= limit:
+        return text
+
+    budget = limit - twitter_length(ellipsis)
+    kept: List[str] = []
+    used = 0
+    # Whitespace-separated tokens keep every URL inside one token
+    for token in re.split(r'(\s+)', text):
+        weight = twitter_length(token)
+        if used + weight > budget:
+            break
+        kept.append(token)
+        used += weight
+
+    short = ''.join(kept).rstrip(' \t\n,;:-')
+    if not short:
+        # A single word longer than the limit: cut it by characters
+        for char in text:
+            if used + _char_weight(char) > budget:
+                break
+            short += char
+            used += _char_weight(char)
+    return short + ellipsis
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences and lines."""
+    return [sentence.strip() for sentence in _SENTENCE_RE.split(text) if sentence and sentence.strip()]
+
+
+def _terms(sentence: str) -> List[str]:
+    """Content words of a sentence (links and hashtags excluded)."""
+    sentence = _HASHTAG_RE.sub(' ', _URL_RE.sub(' ', sentence))
+    return [word for word in _WORD_RE.findall(sentence.lower()) if word not in _STOPWORDS]
+
+
+def _tfidf(sentences: List[List[str]]) -> List[Dict[str, float]]:
+    """TF-IDF vector (sparse dict) of every sentence, treating sentences as documents."""
+    count = len(sentences)
+    document_frequency = Counter(term for terms in sentences for term in set(terms))
+    vectors = []
+    for terms in sentences:
+        frequencies = Counter(terms)
+        total = len(terms) or 1
+        vectors.append({
+            term: (n / total) * (math.log((1 + count) / (1 + document_frequency[term])) + 1)
+            for term, n in frequencies.items()
+        })
+    return vectors
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+    if not dot:
+        return 0.0
+    norm_a = math.sqrt(sum(w * w for w in a.values()))
+    norm_b = math.sqrt(sum(w * w for w in b.values()))
+    return dot / (norm_a * norm_b)
+
+
+def textrank(vectors: List[Dict[str, float]], damping: float = 0.85, iterations: int = 50) -> List[float]:
+    """
+    Rank sentences by centrality in their cosine-similarity graph.
+
+    Args:
+        vectors: TF-IDF vector of every sentence
+        damping: PageRank damping factor
+        iterations: Maximum power iterations
+
+    Returns:
+        Score of every sentence
+    """
+    count = len(vectors)
+    if count <= 1:
+        return [1.0] * count
+
+    similarity = [[0.0] * count for _ in range(count)]
+    for i in range(count):
+        for j in range(i + 1, count):
+            similarity[i][j] = similarity[j][i] = _cosine(vectors[i], vectors[j])
+    out_weight = [sum(row) for row in similarity]
+
+    scores = [1.0 / count] * count
+    for _ in range(iterations):
+        updated = [
+            (1 - damping) / count + damping * sum(
+                similarity[j][i] / out_weight[j] * scores[j]
+                for j in range(count) if out_weight[j]
+            )
+            for i in range(count)
+        ]
+        converged = max(abs(a - b) for a, b in zip(updated, scores)) < 1e-6
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def keyword_hashtags(text: str, limit: int = 2) -> List[str]:
+    """
+    Hashtags for a text: its own hashtags first, then its most frequent keywords.
+
+    Args:
+        text: Full post text
+        limit: Maximum hashtags returned
+
+    Returns:
+        Hashtags such as ['#Launch', '#Coffee']
+    """
+    hashtags: List[str] = []
+    seen = set()
+    for hashtag in _HASHTAG_RE.findall(text):
+        if hashtag.lower() not in seen:
+            seen.add(hashtag.lower())
+            hashtags.append(hashtag)
+
+    counts = Counter(_terms(text))
+    # Frequent words first; among equals the longer (more specific) one
+    for term in sorted(counts, key=lambda t: (counts[t], len(t)), reverse=True):
+        if len(hashtags) >= limit:
+            break
+        tag = f"#{term.capitalize()}"
+        if 4 <= len(term) <= MAX_HASHTAG_WORD and tag.lower() not in seen:
+            seen.add(tag.lower())
+            hashtags.append(tag)
+    return hashtags[:limit]
+
+
+def build_short_version(text: str, limit: int = TWEET_LIMIT, max_hashtags: int = 2) -> str:
+    """
+    Build a tweet from the most central sentences of a post.
+
+    Sentences are picked by TextRank score, kept in their original order,
+    and never cut mid-word; keyword hashtags and the post's first link are
+    added when they fit.
+
+    Args:
+        text: Full post text
+        limit: Maximum weighted length of the result
+        max_hashtags: Maximum hashtags in the result
+
+    Returns:
+        Short version that fits Twitter
+    """
+    text = text.strip()
+    if not text:
+        return ''
+
+    hashtags = [tag for tag in keyword_hashtags(text, max_hashtags) if tag.lower() not in text.lower()]
+    if twitter_length(text) <= limit:
+        # Already tweet-sized: only add missing hashtags that fit
+        for tag in hashtags:
+            if twitter_length(f"{text} {tag}") <= limit:
+                text = f"{text} {tag}"
+        return text
+
+    sentences = split_sentences(text)[:100]
+    scores = textrank(_tfidf([_terms(sentence) for sentence in sentences]))
+    # Posts lead with their point: break ties toward earlier sentences
+    ranked = sorted(range(len(sentences)), key=lambda i: scores[i] * (1 + 0.1 / (i + 1)), reverse=True)
+
+    suffix = ' '.join(hashtags)
+    budget = limit - (twitter_length(suffix) + 1 if suffix else 0)
+    # Keep room for the post's first link
+    urls = _URL_RE.findall(text)
+    if urls:
+        budget -= TCO_URL_LENGTH + 1
+    chosen: List[int] = []
+    used = 0
+    for index in ranked:
+        weight = twitter_length(sentences[index]) + (1 if chosen else 0)
+        if used + weight <= budget:
+            chosen.append(index)
+            used += weight
+
+    if chosen:
+        body = ' '.join(sentences[i] for i in sorted(chosen))
+    else:
+        body = truncate_weighted(sentences[ranked[0]], budget)
+
+    if urls and not _URL_RE.search(body):
+        body = f"{body} {urls[0]}"
+
+    # Hashtags already inside the chosen sentences are not repeated
+    suffix = ' '.join(tag for tag in hashtags if tag.lower() not in body.lower())
+    return truncate_weighted(f"{body} {suffix}" if suffix else body, limit)
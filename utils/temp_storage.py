@@ -0,0 +1,211 @@
+"""Bounded temporary file storage with scoped handles."""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from config import config
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Files this young may belong to another process that is still using them
+EVICTION_GRACE_SECONDS = 300
+
+
+class TempScope:
+    """Files created for one unit of work; all removed on release."""
+
+    def __init__(self, storage: 'TempStorage'):
+        """
+        Initialize scope.
+
+        Args:
+            storage: Owning storage manager
+        """
+        self.storage = storage
+        self.paths: List[Path] = []
+        self.released = False
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> Path:
+        """
+        Reserve a file path inside the temp directory.
+
+        Args:
+            name: File name
+
+        Returns:
+            Path that is protected from eviction until release
+        """
+        return self.adopt(self.storage.directory / name)
+
+    def adopt(self, path: Path) -> Path:
+        """
+        Take ownership of a temp file (safe to call from worker threads).
+
+        A released scope takes nothing: a file created for it afterwards
+        is unowned and must be discarded by its creator.
+        """
+        with self._lock:
+            if not self.released:
+                self.storage._acquire(path)
+                self.paths.append(path)
+        return path
+
+    def release(self):
+        """Delete all files of this scope."""
+        with self._lock:
+            self.released = True
+            paths, self.paths = self.paths, []
+        for path in paths:
+            self.storage._release(path)
+
+    def __enter__(self) -> 'TempScope':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class TempStorage:
+    """Temp directory with a disk quota, LRU eviction and orphan sweeping."""
+
+    def __init__(self, directory: Path, quota_bytes: int, orphan_max_age: float):
+        """
+        Initialize temp storage.
+
+        Args:
+            directory: Directory holding temporary files
+            quota_bytes: Maximum total size before eviction starts
+            orphan_max_age: Age in seconds after which unowned files are swept
+        """
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self.orphan_max_age = orphan_max_age
+        self.evictions = 0
+        self.swept = 0
+        self._in_use: Dict[Path, int] = {}
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def scope(self) -> TempScope:
+        """Open a scope whose files are deleted when it is released."""
+        return TempScope(self)
+
+    def _acquire(self, path: Path):
+        with self._lock:
+            self._in_use[path] = self._in_use.get(path, 0) + 1
+
+    def _release(self, path: Path):
+        with self._lock:
+            count = self._in_use.get(path, 0) - 1
+            if count > 0:
+                self._in_use[path] = count
+                return
+            self._in_use.pop(path, None)
+        self._remove(path)
+
+    def discard(self, path: Path):
+        """Delete a file unless a scope still owns it."""
+        with self._lock:
+            if path in self._in_use:
+                return
+        self._remove(path)
+
+    @staticmethod
+    def _remove(path: Path) -> int:
+        """Delete a file and return the bytes freed."""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            logger.debug(f"Cleaned up: {path}")
+            return size
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.error(f"Failed to cleanup {path}: {e}")
+            return 0
+
+    def _files(self) -> List[Tuple[Path, int, float]]:
+        """List (path, size, mtime) of regular files in the temp directory."""
+        files = []
+        try:
+            for entry in os.scandir(self.directory):
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files.append((Path(entry.path), stat.st_size, stat.st_mtime))
+                except FileNotFoundError:
+                    # Removed concurrently (e.g. by a worker process)
+                    continue
+        except FileNotFoundError:
+            pass
+        return files
+
+    def _in_use_paths(self) -> Set[Path]:
+        with self._lock:
+            return set(self._in_use)
+
+    def sweep(self) -> int:
+        """
+        Remove orphaned files left behind by crashes or earlier runs.
+
+        Returns:
+            Number of files removed
+        """
+        cutoff = time.time() - self.orphan_max_age
+        in_use = self._in_use_paths()
+        removed = 0
+        for path, _, mtime in self._files():
+            if path not in in_use and mtime < cutoff:
+                if self._remove(path):
+                    removed += 1
+
+        self.swept += removed
+        if removed:
+            logger.info(f"🧹 Removed {removed} orphaned temp files from {self.directory}")
+        return removed
+
+    def enforce_quota(self):
+        """Evict least recently modified unowned files until under quota."""
+        grace_cutoff = time.time() - EVICTION_GRACE_SECONDS
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        if total <= self.quota_bytes:
+            return
+
+        in_use = self._in_use_paths()
+        for path, _, mtime in sorted(files, key=lambda f: f[2]):
+            if total <= self.quota_bytes:
+                break
+            if path in in_use or mtime > grace_cutoff:
+                continue
+            freed = self._remove(path)
+            if freed:
+                total -= freed
+                self.evictions += 1
+
+        if total > self.quota_bytes:
+            logger.warning(f"⚠️ Temp storage over quota ({total} > {self.quota_bytes} bytes), remaining files are in use")
+
+    def usage(self) -> Dict[str, int]:
+        """Current disk usage and counters for metrics."""
+        files = self._files()
+        return {
+            'files': len(files),
+            'bytes': sum(size for _, size, _ in files),
+            'quota_bytes': self.quota_bytes,
+            'in_use': len(self._in_use_paths()),
+            'evictions': self.evictions,
+            'swept': self.swept,
+        }
+
+
+# Create global temp storage instance
+temp_storage = TempStorage(
+    config.TEMP_DIR,
+    quota_bytes=config.TEMP_QUOTA_MB * 1024 * 1024,
+    orphan_max_age=config.TEMP_ORPHAN_MAX_AGE
+)
@@ -0,0 +1,193 @@
+"""Entity-aware text preprocessing before AI processing."""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Telegram entity types that are replaced with placeholders
+PROTECTED_ENTITY_TYPES = {
+    'url': 'U',
+    'email': 'U',
+    'mention': 'M',
+    'hashtag': 'H',
+    'cashtag': 'H',
+}
+
+PLACEHOLDER_RE = re.compile(r'\{([UMH])(\d+)\}')
+
+# Used when the message carries no entities (e.g. text from other sources)
+_FALLBACK_ENTITY_RE = re.compile(
+    r'(?P<url>(?:https?://|www\.|t\.me/)\S+)'
+    r'|(?<!\w)(?P<mention>@\w{4,32})'
+    r'|(?<!\w)(?P<hashtag>#\w+)',
+    re.IGNORECASE
+)
+
+# All line-dropping rules compiled into one pattern, applied in a single pass
+_DROP_LINE_RE = re.compile(
+    r'^[ \t]*(?:'
+    # Signature lines starting with a mention
+    r'(?:@|\{M\d+\}).*'
+    # Separator lines made only of dashes, underscores, bars...
+    r'|[—_\-=|–]+'
+    # Short "Channel | @link" footers
+    r'|(?=[^\n]*\|)(?=[^\n]*(?:@|\{[UM]\d+\}|t\.me/))[^\n]{1,59}'
+    r')[ \t]*(?:\n|$)',
+    re.MULTILINE
+)
+
+
+class PreprocessedText:
+    """Text with protected entities swapped for compact placeholders."""
+
+    def __init__(self, text: str, entities: Optional[Sequence] = None):
+        """
+        Initialize preprocessed text.
+
+        Args:
+            text: Original message text
+            entities: Telegram MessageEntity objects (or dicts) for the text
+        """
+        self.original = text or ''
+        self.text = self.original
+        self.entities = entities or ()
+        self.placeholders: Dict[str, str] = {}
+        # (kind, value) -> placeholder, and placeholders issued per kind
+        self._by_value: Dict[Tuple[str, str], str] = {}
+        self._counts: Dict[str, int] = {}
+
+    def add_placeholder(self, kind: str, value: str) -> str:
+        """
+        Register a protected value and return its placeholder.
+
+        Identical values share a placeholder to save tokens.
+        """
+        placeholder = self._by_value.get((kind, value))
+        if placeholder:
+            return placeholder
+
+        count = self._counts.get(kind, 0) + 1
+        self._counts[kind] = count
+        placeholder = f"{{{kind}{count}}}"
+        self.placeholders[placeholder] = value
+        self._by_value[(kind, value)] = placeholder
+        return placeholder
+
+    def escape_literals(self, text: str) -> str:
+        """
+        Protect placeholder-like text already present in the input.
+
+        A literal "{U1}" typed by the user becomes a placeholder of its
+        own, so restore() gives it back verbatim instead of a link.
+        """
+        return PLACEHOLDER_RE.sub(lambda m: self.add_placeholder(m.group(1), m.group(0)), text)
+
+    def restore(self, text: str, append_missing: bool = False) -> str:
+        """
+        Put the original values back in place of placeholders.
+
+        Args:
+            text: Text containing placeholders (e.g. AI output)
+            append_missing: Append URLs the model dropped at the end
+
+        Returns:
+            Text with placeholders restored
+        """
+        if not text or not self.placeholders:
+            return text
+
+        restored = PLACEHOLDER_RE.sub(
+            lambda m: self.placeholders.get(m.group(0), m.group(0)),
+            text
+        )
+
+        if append_missing:
+            missing = [
+                value for placeholder, value in self.placeholders.items()
+                if placeholder[1] == 'U' and placeholder not in text
+                and value not in restored and not PLACEHOLDER_RE.fullmatch(value)
+            ]
+            if missing:
+                restored = restored.rstrip() + '\n\n' + '\n'.join(missing)
+
+        return restored
+
+
+def _entity_field(entity, name: str):
+    """Read a field from a MessageEntity object or a plain dict."""
+    if isinstance(entity, dict):
+        return entity.get(name)
+    return getattr(entity, name, None)
+
+
+def protect_entities(doc: PreprocessedText) -> None:
+    """Replace URLs, mentions and hashtags with placeholders."""
+    if not doc.text:
+        return
+
+    if not doc.entities:
+        doc.text = _FALLBACK_ENTITY_RE.sub(
+            lambda m: doc.add_placeholder(
+                PROTECTED_ENTITY_TYPES[m.lastgroup], m.group(0)
+            ),
+            doc.escape_literals(doc.text)
+        )
+        return
+
+    # Telegram offsets are measured in UTF-16 code units
+    encoded = doc.text.encode('utf-16-le')
+    entities = sorted(
+        (e for e in doc.entities if _entity_field(e, 'type') in PROTECTED_ENTITY_TYPES),
+        key=lambda e: _entity_field(e, 'offset')
+    )
+
+    parts: List[str] = []
+    cursor = 0
+    for entity in entities:
+        start = _entity_field(entity, 'offset') * 2
+        end = start + _entity_field(entity, 'length') * 2
+        if start < cursor or end > len(encoded):
+            continue
+
+        parts.append(doc.escape_literals(encoded[cursor:start].decode('utf-16-le')))
+        value = encoded[start:end].decode('utf-16-le')
+        parts.append(doc.add_placeholder(PROTECTED_ENTITY_TYPES[_entity_field(entity, 'type')], value))
+        cursor = end
+
+    parts.append(doc.escape_literals(encoded[cursor:].decode('utf-16-le')))
+    doc.text = ''.join(parts)
+
+
+def clean_forwarded_text(doc: PreprocessedText) -> None:
+    """Remove forwarded message signatures, separators and edge blank lines."""
+    doc.text = _DROP_LINE_RE.sub('', doc.text).strip()
+
+
+class TextPreprocessor:
+    """Composable preprocessing pipeline applied before the AI call."""
+
+    DEFAULT_STEPS = (protect_entities, clean_forwarded_text)
+
+    def __init__(self, steps: Optional[Sequence[Callable[[PreprocessedText], None]]] = None):
+        """
+        Initialize preprocessing pipeline.
+
+        Args:
+            steps: Callables run in order, each mutating a PreprocessedText
+        """
+        self.steps = list(steps or self.DEFAULT_STEPS)
+
+    def process(self, text: str, entities: Optional[Sequence] = None) -> PreprocessedText:
+        """
+        Run all preprocessing steps on a message.
+
+        Args:
+            text: Original message text
+            entities: Telegram message entities for the text
+
+        Returns:
+            PreprocessedText holding the cleaned text and placeholders
+        """
+        doc = PreprocessedText(text, entities)
+        for step in self.steps:
+            step(doc)
+        return doc
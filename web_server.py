@@ -4,13 +4,17 @@ Web server for Render deployment.
 Keeps the service alive while running the Telegram bot in background.
 """
 
+import hmac
 import threading
 import sys
 import os
 import asyncio
-from flask import Flask
+from flask import Flask, Response, request
+from config import config
 from bot.telegram_handler import TelegramHandler
 from utils.logger import setup_logger
+from utils.loop_watchdog import sample_stacks
+from utils.temp_storage import temp_storage
 
 logger = setup_logger(__name__)
 
@@ -18,6 +22,11 @@ app = Flask(__name__)
 bot_handler = None
 bot_thread = None
 
+# Longest profile a single request may take
+PROFILE_MAX_SECONDS = 60
+# One profile at a time keeps the sampling overhead bounded
+profile_lock = threading.Lock()
+
 
 @app.route('/')
 def health_check():
@@ -35,6 +44,81 @@ def health():
     return {'status': 'healthy'}, 200
 
 
+@app.route('/metrics')
+def metrics():
+    """Resource usage of the running bot."""
+    data = {'temp_storage': temp_storage.usage()}
+    
+    pipeline = bot_handler.pipeline if bot_handler else None
+    if pipeline and pipeline.ai_processor.translation_memory:
+        data['translation_memory'] = pipeline.ai_processor.translation_memory.stats()
+    if bot_handler and bot_handler.archive:
+        data['archive'] = bot_handler.archive.stats()
+    if bot_handler and bot_handler.watchdog:
+        data['event_loop'] = bot_handler.watchdog.stats()
+    
+    return data, 200
+
+
+def _check_profiler_token():
+    """Return an error response unless the request carries PROFILER_TOKEN."""
+    if not config.PROFILER_TOKEN:
+        return {'error': 'profiler disabled'}, 404
+    
+    auth = request.headers.get('Authorization', '')
+    supplied = auth[len('Bearer '):] if auth.startswith('Bearer ') else ''
+    if not hmac.compare_digest(supplied.encode(), config.PROFILER_TOKEN.encode()):
+        return {'error': 'unauthorized'}, 401
+    return None
+
+
+@app.route('/debug/stall')
+def debug_stall():
+    """
+    Return the last event loop stall with its stack trace.
+    
+    Requires PROFILER_TOKEN as a Bearer token (/metrics only has counters).
+    """
+    error = _check_profiler_token()
+    if error:
+        return error
+    
+    watchdog = bot_handler.watchdog if bot_handler else None
+    if watchdog is None:
+        return {'error': 'watchdog disabled'}, 404
+    return {'last_stall': watchdog.last_stall}, 200
+
+
+@app.route('/debug/profile')
+def debug_profile():
+    """
+    Sample the live bot for N seconds and return collapsed stacks.
+    
+    Query parameters: seconds (default 10), thread=loop to sample only the
+    bot's event loop thread. Requires PROFILER_TOKEN as a Bearer token.
+    """
+    error = _check_profiler_token()
+    if error:
+        return error
+    
+    try:
+        seconds = min(max(float(request.args.get('seconds', 10)), 0.1), PROFILE_MAX_SECONDS)
+    except ValueError:
+        return {'error': 'seconds must be a number'}, 400
+    
+    # The bot's event loop runs in the main thread
+    thread_ids = [threading.main_thread().ident] if request.args.get('thread') == 'loop' else None
+    
+    if not profile_lock.acquire(blocking=False):
+        return {'error': 'a profile is already running'}, 409
+    try:
+        profile = sample_stacks(seconds, thread_ids=thread_ids)
+    finally:
+        profile_lock.release()
+    
+    return Response(profile, mimetype='text/plain')
+
+
 def run_flask():
     """Run Flask web server in a separate thread."""
     port = int(os.environ.get('PORT', 10000))